@@ -0,0 +1,338 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.site import StandInSite  # noqa: E402
+
+# Офлайн-бенчмарк бота: все запросы к сайту уходят в локальную копию (benchmarks/site.py),
+# запросы к Telegram - в FakeSession. Кэш и пользователи - во временном каталоге.
+#
+#   python -m benchmarks.run --concurrency 50 --iterations 2000 --output bench.json
+#   python -m benchmarks.run --baseline bench.json     # сравнить с прошлым запуском
+#
+# Сценарии:
+#   latest   - get_latest_articles из тёплого кэша
+#   search   - search_articles с новыми запросами (загрузка и разбор страницы поиска)
+#   article  - fetch_article_content новых статей (загрузка и разбор longread)
+#   callback - апдейты с нажатиями кнопок через Dispatcher (middleware, роутеры, обработчики):
+#              страницы списка и отправка статей файлом
+#
+# Время запуска процесса - benchmarks/startup.py.
+
+SCENARIOS = ("latest", "search", "article", "callback")
+USER_ID = 1000
+USERS = 100  # нажатия распределяются по пользователям: в одном чате апдейты идут по очереди
+
+
+def configure_env(base_url, workdir):
+    """Настройки для изолированного запуска; задаются до импорта модулей бота."""
+    os.environ["KADROVIK_BASE_URL"] = base_url
+    os.environ.setdefault("BOT_TOKEN", "42:benchmark")
+    os.environ["CACHE_DB_PATH"] = str(Path(workdir) / "cache.db")
+    os.environ["USERS_DB_PATH"] = str(Path(workdir) / "users.db")
+    os.environ["ARCHIVE_DB_PATH"] = str(Path(workdir) / "archive.db")
+    os.environ["CRAWL_INTERVAL"] = "0"
+    os.environ["CACHE_BACKEND"] = "sqlite"
+    os.environ["FLIGHT_BACKEND"] = "local"
+    os.environ["FSM_STORAGE"] = "memory"
+    os.environ["METRICS_PORT"] = "0"
+    # Ограничение частоты нажатий в бенчмарке только мешает
+    os.environ["CALLBACK_RATE"] = "1000000"
+    os.environ["CALLBACK_BURST"] = "1000000"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def fake_session_class():
+    from aiogram.client.session.base import BaseSession
+    from aiogram.methods import AnswerCallbackQuery, EditMessageText, SendDocument
+    from aiogram.types import Chat, Document, Message
+
+    class FakeSession(BaseSession):
+        """Сессия без сети: отвечает на методы Bot API готовыми объектами."""
+
+        def __init__(self):
+            super().__init__()
+            self.calls = 0
+            self._message_id = 0
+
+        async def make_request(self, bot, method, timeout=None):
+            self.calls += 1
+            if isinstance(method, AnswerCallbackQuery):
+                return True
+            self._message_id += 1
+            fields = {
+                "message_id": self._message_id,
+                "date": datetime.now(),
+                "chat": Chat(id=method.chat_id or USER_ID, type="private"),
+            }
+            if isinstance(method, SendDocument):
+                if not isinstance(method.document, str):
+                    # "Загрузка" файла: читаем его, как это сделала бы настоящая сессия
+                    async for _ in method.document.read(bot):
+                        pass
+                fields["document"] = Document(
+                    file_id=f"file-{self._message_id}", file_unique_id=f"u{self._message_id}"
+                )
+            elif isinstance(method, EditMessageText):
+                fields["text"] = method.text
+            else:
+                fields["text"] = getattr(method, "text", None)
+            return Message(**fields).as_(bot)
+
+        async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+            yield b""
+
+        async def close(self):
+            pass
+
+    return FakeSession
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_rss_bytes():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдаёт килобайты, macOS - байты
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Bench:
+    def __init__(self, site, bot, main):
+        self.site = site
+        self.bot = bot
+        self.main = main
+        self.counter = 0
+        self.article_ids = []
+
+    def _next(self):
+        self.counter += 1
+        return self.counter
+
+    async def setup(self):
+        from utils.formatters import article_id
+        from utils.http import start_http_client
+        from utils.parser import get_latest_articles
+        from utils.storage import warm_cache
+
+        await start_http_client()
+        await warm_cache()
+        await self.main.user_manager.start()
+        for user_id in range(USER_ID, USER_ID + USERS):
+            await self.main.user_manager.add_user(str(user_id), "Benchmark", "+998000000000")
+        articles = await get_latest_articles("ru")
+        if not articles:
+            raise RuntimeError("Локальная копия сайта не вернула статей")
+        self.article_ids = [article_id(article["url"]) for article in articles]
+
+    async def teardown(self):
+        from utils.archive import archive
+        from utils.extract import shutdown_parser_pool
+        from utils.http import close_http_client
+        from utils.storage import close_cache
+
+        await close_http_client()
+        await close_cache()
+        await archive.close()
+        await self.main.user_manager.close()
+        shutdown_parser_pool()
+
+    async def latest(self):
+        from utils.parser import get_latest_articles
+
+        await get_latest_articles("ru")
+
+    async def search(self):
+        from utils.parser import search_articles
+
+        # Каждый раз новый запрос: в кэше и индексе ответа нет, идём на "сайт"
+        await search_articles(f"bench{self._next()}", "ru")
+
+    async def article(self):
+        from utils.parser import fetch_article_content
+
+        await fetch_article_content(f"{self.site.base_url}articles/bench-{self._next()}")
+
+    async def callback(self):
+        from aiogram.types import Update
+
+        n = self._next()
+        user_id = USER_ID + n % USERS
+        if n % 2:
+            data = f"latest_page:ru:{n // 2 % 2}"
+        else:
+            data = f"article:{self.article_ids[n // 2 % len(self.article_ids)]}"
+        update = Update.model_validate({
+            "update_id": n,
+            "callback_query": {
+                "id": str(n),
+                "from": {"id": user_id, "is_bot": False, "first_name": "Benchmark"},
+                "chat_instance": "bench",
+                "message": {
+                    "message_id": n, "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private"}, "text": "menu"
+                },
+                "data": data,
+            },
+        }, context={"bot": self.bot})
+        await self.main.dp.feed_update(self.bot, update)
+
+    async def _drive(self, func, iterations, concurrency):
+        latencies = []
+        errors = []
+        queue = iter(range(iterations))
+
+        async def worker():
+            for _ in queue:
+                start = time.perf_counter()
+                try:
+                    await func()
+                except Exception as e:
+                    errors.append(repr(e))
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, errors, time.perf_counter() - start
+
+    async def run(self, name, iterations, concurrency, alloc_iterations):
+        func = getattr(self, name)
+        requests_before = sum(self.site.requests.values())
+        latencies, errors, elapsed = await self._drive(func, iterations, concurrency)
+        upstream = sum(self.site.requests.values()) - requests_before
+
+        # Аллокации - отдельным коротким прогоном: tracemalloc заметно замедляет код
+        tracemalloc.start()
+        base, _ = tracemalloc.get_traced_memory()
+        await self._drive(func, alloc_iterations, concurrency)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        ms = [value * 1000 for value in latencies]
+        return {
+            "iterations": iterations,
+            "concurrency": concurrency,
+            "errors": len(errors),
+            "first_error": errors[0] if errors else None,
+            "p50_ms": round(percentile(ms, 50), 3),
+            "p95_ms": round(percentile(ms, 95), 3),
+            "p99_ms": round(percentile(ms, 99), 3),
+            "mean_ms": round(sum(ms) / len(ms), 3) if ms else 0.0,
+            "max_ms": round(max(ms), 3) if ms else 0.0,
+            "throughput_rps": round(iterations / elapsed, 1) if elapsed else 0.0,
+            "upstream_requests": upstream,
+            "alloc_iterations": alloc_iterations,
+            "alloc_peak_bytes": peak - base,
+            "alloc_retained_bytes": current - base,
+            "rss_peak_bytes": peak_rss_bytes(),
+        }
+
+
+def compare(baseline, result):
+    """Изменение ключевых показателей относительно прошлого запуска."""
+    lines = [f"Сравнение с {baseline.get('commit') or 'baseline'}:"]
+    for name, current in result["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        parts = []
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "alloc_peak_bytes"):
+            old, new = previous.get(metric), current.get(metric)
+            if old:
+                parts.append(f"{metric} {(new - old) / old * 100:+.1f}%")
+        lines.append(f"  {name}: " + ", ".join(parts))
+    return "\n".join(lines)
+
+
+async def run_benchmarks(args):
+    site = StandInSite(delay=args.delay_ms / 1000)
+    base_url = await site.start()
+    workdir = tempfile.TemporaryDirectory(prefix="kadrovik-bench-")
+    configure_env(base_url, workdir.name)
+
+    # Модули бота читают настройки при импорте - импортируем после configure_env
+    from aiogram import Bot
+    import main
+
+    bot = Bot(token=os.environ["BOT_TOKEN"], session=fake_session_class()())
+    bench = Bench(site, bot, main)
+    result = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "delay_ms": args.delay_ms,
+        },
+        "scenarios": {},
+    }
+    try:
+        await bench.setup()
+        for name in args.scenarios:
+            result["scenarios"][name] = await bench.run(
+                name, args.iterations, args.concurrency, min(args.iterations, args.alloc_iterations)
+            )
+    finally:
+        await bench.teardown()
+        await bot.session.close()
+        await site.stop()
+        workdir.cleanup()
+    return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Офлайн-бенчмарк Kadrovik-бота")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--delay-ms", type=float, default=0, help="задержка ответа локального сайта")
+    parser.add_argument("--alloc-iterations", type=int, default=100, help="прогонов под tracemalloc")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--output", help="файл для JSON (по умолчанию - stdout)")
+    parser.add_argument("--baseline", help="JSON прошлого запуска для сравнения")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = asyncio.run(run_benchmarks(args))
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        print(compare(baseline, result), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
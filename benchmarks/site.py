@@ -0,0 +1,96 @@
+import asyncio
+import hashlib
+import sys
+from collections import Counter
+from pathlib import Path
+from aiohttp import web
+
+# Локальная замена Kadrovik.uz для бенчмарков: отдаёт страницы из fixtures/.
+# Они написаны вручную по разметке сайта, а не сохранены с него (см. utils.extract.check_fixtures).
+# Лента - "/" и "/uz/", поиск - ".../search", всё остальное - страница статьи.
+# Бота можно направить сюда вручную: KADROVIK_BASE_URL=http://127.0.0.1:8090/
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "fixtures"
+LIVE_BASE_URL = "https://kadrovik.uz/"
+
+PAGES = {
+    "listing_ru": "listing_ru.html",
+    "listing_uz": "listing_uz.html",
+    "search": "search_ru.html",
+    "article": "longread.html",
+}
+
+
+class StandInSite:
+    def __init__(self, fixtures_dir=FIXTURES_DIR, delay=0.0):
+        self.fixtures_dir = Path(fixtures_dir)
+        self.delay = delay
+        self.requests = Counter()
+        self.pages = {}
+        self.base_url = None
+        self.runner = None
+
+    def _load(self):
+        # Абсолютные ссылки на живой сайт переписываем на локальный адрес,
+        # иначе статьи из ленты уйдут в сеть
+        for kind, name in PAGES.items():
+            html = (self.fixtures_dir / name).read_text(encoding="utf-8")
+            body = html.replace(LIVE_BASE_URL, self.base_url).encode("utf-8")
+            self.pages[kind] = (body, '"' + hashlib.sha1(body).hexdigest() + '"')
+
+    def _kind(self, path):
+        parts = [part for part in path.split("/") if part]
+        if parts and parts[0] == "uz":
+            parts = parts[1:]
+            if not parts:
+                return "listing_uz"
+        if not parts:
+            return "listing_ru"
+        if parts == ["search"]:
+            return "search"
+        return "article"
+
+    async def handle(self, request):
+        kind = self._kind(request.path)
+        self.requests[kind] += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        body, etag = self.pages[kind]
+        if request.headers.get("If-None-Match") == etag:
+            self.requests["not_modified"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(body=body, content_type="text/html", charset="utf-8", headers={"ETag": etag})
+
+    async def start(self, host="127.0.0.1", port=0):
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.base_url = f"http://{host}:{port}/"
+        self._load()
+        return self.base_url
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+
+async def serve(port):
+    site = StandInSite()
+    print(f"Kadrovik.uz (локальная копия): {await site.start(port=port)}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await site.stop()
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.site [порт]
+    try:
+        asyncio.run(serve(int(sys.argv[1]) if len(sys.argv) > 1 else 8090))
+    except KeyboardInterrupt:
+        pass
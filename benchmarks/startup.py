@@ -0,0 +1,114 @@
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.run import configure_env, git_commit  # noqa: E402
+from benchmarks.site import StandInSite  # noqa: E402
+
+# Время запуска бота: каждый прогон - новый процесс интерпретатора (холодный импорт),
+# пустые кэш и архив во временном каталоге, сайт - локальная копия (benchmarks/site.py).
+#
+#   python -m benchmarks.startup --runs 5 --output startup.json
+#   python -m benchmarks.startup --baseline startup.json
+#
+# import_ms  - import main (aiogram, обработчики, настройки)
+# startup_ms - on_startup + on_shutdown (HTTP-клиент, прогрев кэша, индекс, база пользователей)
+
+CHILD = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+async def cycle():
+    # worker_index=1: без фонового обновления ленты и обхода архива
+    await main.on_startup(worker_index=1)
+    await main.on_shutdown()
+asyncio.run(cycle())
+finished = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (finished - imported) * 1000,
+    "modules": len(sys.modules),
+    "bs4_loaded": "bs4" in sys.modules,
+    "lxml_loaded": "lxml" in sys.modules,
+    "aiohttp_web_loaded": "aiohttp.web" in sys.modules,
+}))
+"""
+
+
+def run_once(base_url):
+    with tempfile.TemporaryDirectory(prefix="kadrovik-startup-") as workdir:
+        configure_env(base_url, workdir)
+        output = subprocess.check_output([sys.executable, "-c", CHILD], cwd=ROOT, text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(runs):
+    result = {}
+    for metric in ("import_ms", "startup_ms"):
+        values = [run[metric] for run in runs]
+        result[f"{metric}_median"] = round(statistics.median(values), 1)
+        result[f"{metric}_min"] = round(min(values), 1)
+    last = runs[-1]
+    for key in ("modules", "bs4_loaded", "lxml_loaded", "aiohttp_web_loaded"):
+        result[key] = last[key]
+    return result
+
+
+async def measure(runs):
+    site = StandInSite()
+    base_url = await site.start()
+    try:
+        # Процессы запускаются в потоке: локальный сайт должен отвечать в это время
+        return [await asyncio.to_thread(run_once, base_url) for _ in range(runs)]
+    finally:
+        await site.stop()
+
+
+def compare(baseline, result):
+    lines = [f"Сравнение с {baseline.get('commit') or 'baseline'}:"]
+    for metric in ("import_ms_median", "startup_ms_median"):
+        old, new = baseline.get("startup", {}).get(metric), result["startup"][metric]
+        if old:
+            lines.append(f"  {metric}: {old} -> {new} ({(new - old) / old * 100:+.1f}%)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Время запуска Kadrovik-бота")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="файл для JSON (по умолчанию - stdout)")
+    parser.add_argument("--baseline", help="JSON прошлого запуска для сравнения")
+    args = parser.parse_args(argv)
+
+    runs = asyncio.run(measure(args.runs))
+    result = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "runs": args.runs,
+        "startup": summarize(runs),
+    }
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        print(compare(baseline, result), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
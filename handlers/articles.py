@@ -0,0 +1,91 @@
+import logging
+from aiogram import F, Router, types
+from aiogram.exceptions import TelegramBadRequest
+from handlers.common import answer_chunks
+from settings import MAX_ARTICLES, ARTICLE_DELIVERY, SUPPORTED_LANGUAGES
+from utils.documents import send_article_document
+from utils.formatters import render_latest_page, chunk_stream
+from utils.languages import user_language
+from utils.parser import get_latest_articles, fetch_article_content, get_article_by_id, stream_article_content
+
+logger = logging.getLogger(__name__)
+
+router = Router(name="articles")
+
+
+# Страница списка последних статей (готовый текст и клавиатура общие для всех)
+async def send_latest_page(message: types.Message, lang, page=0, edit=False):
+    articles = await get_latest_articles(lang)
+    if not articles:
+        await message.answer("Не удалось загрузить статьи. Попробуйте позже.")
+        return
+    chunks, keyboard = render_latest_page(articles[:MAX_ARTICLES], lang, page)
+    if edit and len(chunks) == 1:
+        try:
+            await message.edit_text(chunks[0], parse_mode="Markdown", reply_markup=keyboard)
+            return
+        except TelegramBadRequest as e:
+            if "message is not modified" in str(e):
+                return
+    await answer_chunks(message, chunks, parse_mode="Markdown", reply_markup=keyboard)
+
+
+# Статья текстом: сообщения уходят по мере загрузки страницы, не дожидаясь всего текста
+async def send_article_text(message: types.Message, article):
+    sent = False
+    try:
+        async for chunk in chunk_stream(stream_article_content(article['url'])):
+            await message.answer(chunk)
+            sent = True
+    except Exception as e:
+        logger.warning("Ошибка загрузки статьи", extra={"url": article["url"], "error": str(e)})
+    if not sent:
+        await message.answer("Не удалось загрузить содержимое статьи.")
+
+
+@router.callback_query(F.data == "kadrovik_latest")
+async def show_latest(callback: types.CallbackQuery, user):
+    await send_latest_page(callback.message, user_language(user))
+
+
+@router.callback_query(F.data.startswith("latest_page:"))
+async def show_latest_page(callback: types.CallbackQuery):
+    # callback_data приходит от клиента: неизвестный язык не должен превращаться в запрос к сайту
+    try:
+        _, lang, page = callback.data.split(":")
+        page = int(page)
+    except ValueError:
+        return
+    if lang not in SUPPORTED_LANGUAGES:
+        return
+    await send_latest_page(callback.message, lang, page, edit=True)
+
+
+@router.callback_query(F.data.startswith("article:"))
+async def show_article(callback: types.CallbackQuery):
+    ref_id = callback.data.split(":", 1)[1]
+    article = await get_article_by_id(ref_id)
+    if not article:
+        await callback.message.answer("Статья не найдена.")
+    elif ARTICLE_DELIVERY == "text":
+        await send_article_text(callback.message, article)
+    else:
+        content = await fetch_article_content(article['url'])
+        if content:
+            # Файл собирается в памяти; повторно отправляется по file_id
+            await send_article_document(
+                callback.message,
+                content,
+                filename=f"article_{ref_id}.txt",
+                caption=f"📰 *{article['title']}*\n📅 {article['date']}",
+                parse_mode="Markdown"
+            )
+        else:
+            logger.warning("Не удалось загрузить содержимое статьи", extra={"url": article["url"]})
+            await callback.message.answer("Не удалось загрузить содержимое статьи.")
+
+
+# Кнопки из старых сообщений (по номеру в списке)
+@router.callback_query(F.data.startswith("article_"))
+async def outdated_article_button(callback: types.CallbackQuery):
+    await callback.message.answer("Список статей устарел. Откройте его заново.")
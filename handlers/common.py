@@ -0,0 +1,27 @@
+from aiogram import types
+from aiogram.exceptions import TelegramBadRequest
+from utils.formatters import split_message
+
+# Общие помощники для отправки ответов
+
+
+async def answer_chunks(message: types.Message, chunks, parse_mode=None, reply_markup=None):
+    """Отправка длинного текста частями (лимит Telegram - 4096 символов)."""
+    for chunk in chunks[:-1]:
+        await message.answer(chunk, parse_mode=parse_mode)
+    await message.answer(chunks[-1], parse_mode=parse_mode, reply_markup=reply_markup)
+
+
+async def answer_long(message: types.Message, text, parse_mode=None, reply_markup=None):
+    await answer_chunks(message, split_message(text), parse_mode, reply_markup)
+
+
+async def edit_or_answer(message: types.Message, text, parse_mode=None, reply_markup=None):
+    """Меняет сообщение с кнопками на месте; если это невозможно - отправляет новое."""
+    try:
+        await message.edit_text(text, parse_mode=parse_mode, reply_markup=reply_markup)
+        return
+    except TelegramBadRequest as e:
+        if "message is not modified" in str(e):
+            return
+    await message.answer(text, parse_mode=parse_mode, reply_markup=reply_markup)
@@ -1,7 +1,24 @@
-from aiogram import Router, types
+from aiogram import F, Router, types
+from handlers.common import answer_long
+from settings import MAX_ARTICLES
+from utils.languages import user_language
 
-router = Router()
+try:
+    from news import fetch_news
+except ImportError:
+    async def fetch_news(lang="ru"):
+        return [{"title": "Новость 1", "date": "2025-05-15", "url": "https://example.com"}]
 
-@router.callback_query(lambda c: c.data == "news")
-async def news_handler(callback_query: types.CallbackQuery):
-    await callback_query.message.answer("📰 Здесь будут актуальные статьи (парсинг).")
+router = Router(name="news")
+
+
+@router.callback_query(F.data == "kadrovik_news")
+async def show_news(callback: types.CallbackQuery, user):
+    news = await fetch_news(user_language(user))
+    if news:
+        response = "🔔 Последние новости:\n\n"
+        for item in news[:MAX_ARTICLES]:
+            response += f"📢 *{item['title']}*\n📅 {item['date']}\n🔗 {item['url']}\n\n"
+        await answer_long(callback.message, response, parse_mode="Markdown")
+    else:
+        await callback.message.answer("Не удалось загрузить новости. Попробуйте позже.")
@@ -1,20 +1,50 @@
-# bot/handlers/search.py
-from aiogram import types
-from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
-from loader import dp
-from bot.services.parser import parse_article_text
+from aiogram import F, Router, types
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from handlers.common import answer_long
+from settings import DEFAULT_LANGUAGE, MAX_ARTICLES
+from utils.languages import user_language
+from utils.parser import search_articles
 
-# Пример: пользователь выбрал статью по инлайн-кнопке
-@dp.callback_query_handler(lambda c: c.data.startswith("read_article:"))
-async def send_article(callback_query: types.CallbackQuery):
-    article_url = callback_query.data.split(":", 1)[1]
+try:
+    from search import search as custom_search
+except ImportError:
+    async def custom_search(query, lang="ru"):
+        return [{"title": f"Результат для {query}", "date": "2025-05-15", "url": "https://example.com"}]
 
-    await callback_query.message.edit_text("⏳ Загружаем статью...")
+router = Router(name="search")
 
-    parsed_text = parse_article_text(article_url)
 
-    if len(parsed_text) > 4096:
-        for i in range(0, len(parsed_text), 4096):
-            await callback_query.message.answer(parsed_text[i:i+4096])
+class SearchStates(StatesGroup):
+    WAITING_FOR_QUERY = State()
+
+
+@router.callback_query(F.data == "kadrovik_search")
+async def ask_query(callback: types.CallbackQuery, state: FSMContext, user):
+    await callback.message.answer("Введите запрос для поиска статей на Kadrovik.uz:")
+    await state.set_state(SearchStates.WAITING_FOR_QUERY)
+    # Язык запоминается вместе с состоянием: сообщению с запросом не нужна запись пользователя
+    await state.update_data(lang=user_language(user))
+
+
+# Обработка поискового запроса
+@router.message(SearchStates.WAITING_FOR_QUERY)
+async def process_search_query(message: types.Message, state: FSMContext):
+    query = message.text
+    lang = (await state.get_data()).get("lang", DEFAULT_LANGUAGE)
+    articles = await search_articles(query, lang)
+    if articles:
+        response = f"📰 Результаты поиска по запросу '{query}':\n\n"
+        for article in articles[:MAX_ARTICLES]:
+            response += f"{article['emoji']} *{article['title']}*\n📅 {article['date']}\n🔗 {article['url']}\n\n"
+        await answer_long(message, response, parse_mode="Markdown")
     else:
-        await callback_query.message.answer(parsed_text)
+        custom_results = await custom_search(query, lang)
+        if custom_results:
+            response = f"📰 Результаты поиска (альтернативный метод) по запросу '{query}':\n\n"
+            for result in custom_results[:MAX_ARTICLES]:
+                response += f"📢 *{result['title']}*\n📅 {result['date']}\n🔗 {result['url']}\n\n"
+            await answer_long(message, response, parse_mode="Markdown")
+        else:
+            await message.answer(f"По запросу '{query}' ничего не найдено.")
+    await state.clear()
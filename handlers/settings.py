@@ -1,7 +1,45 @@
-from aiogram import Router, types
+from aiogram import F, Router, types
+from handlers.common import edit_or_answer
+from keyboards import get_language_menu, get_subscriptions_menu
+from settings import SUPPORTED_LANGUAGES
+from utils.languages import language_name, user_language
 
-router = Router()
+router = Router(name="settings")
 
-@router.callback_query(lambda c: c.data == "settings")
-async def settings_handler(callback_query: types.CallbackQuery):
-    await callback_query.message.answer("⚙️ Настройки (язык, очистка истории и т.д.)")
+SUBSCRIPTIONS_TEXT = "🔔 Уведомления о новых статьях Kadrovik.uz. Выберите язык:"
+
+
+def language_text(lang):
+    return f"🌐 Статьи Kadrovik.uz показываются на языке: {language_name(lang)}. Выберите язык:"
+
+
+# Меню подписок на новые статьи
+@router.callback_query(F.data == "subscriptions")
+async def show_subscriptions(callback: types.CallbackQuery, user):
+    await callback.message.answer(SUBSCRIPTIONS_TEXT, reply_markup=get_subscriptions_menu(user.get("subscriptions", [])))
+
+
+@router.callback_query(F.data.startswith("subscribe:"))
+async def toggle_subscription(callback: types.CallbackQuery, user, user_manager):
+    lang = callback.data.split(":", 1)[1]
+    if lang not in SUPPORTED_LANGUAGES:
+        return
+    enabled = lang not in user.get("subscriptions", [])
+    subscriptions = await user_manager.set_subscription(str(callback.from_user.id), lang, enabled)
+    await edit_or_answer(callback.message, SUBSCRIPTIONS_TEXT, reply_markup=get_subscriptions_menu(subscriptions))
+
+
+# Язык статей: ленты всех языков прогреты при старте, переключение не ждёт сайта
+@router.callback_query(F.data == "language")
+async def show_language(callback: types.CallbackQuery, user):
+    lang = user_language(user)
+    await callback.message.answer(language_text(lang), reply_markup=get_language_menu(lang))
+
+
+@router.callback_query(F.data.startswith("set_language:"))
+async def set_language(callback: types.CallbackQuery, user_manager):
+    lang = callback.data.split(":", 1)[1]
+    if lang not in SUPPORTED_LANGUAGES:
+        return
+    await user_manager.set_language(str(callback.from_user.id), lang)
+    await edit_or_answer(callback.message, language_text(lang), reply_markup=get_language_menu(lang))
@@ -1,13 +1,71 @@
-from aiogram import Router, types
-from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
-
-router = Router()
-
-@router.message(commands=["start"])
-async def start_handler(message: types.Message):
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="🔍 Поиск статьи", callback_data="search")],
-        [InlineKeyboardButton(text="📰 Актуальное Kadrovik.uz", callback_data="news")],
-        [InlineKeyboardButton(text="⚙️ Настройки", callback_data="settings")]
-    ])
-    await message.answer("Добро пожаловать! Выберите опцию:", reply_markup=keyboard)
+from aiogram import F, Router, types
+from aiogram.filters import Command
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from keyboards import get_main_menu
+
+router = Router(name="start")
+# Подключается последним: сюда попадает всё, что не разобрали остальные роутеры
+fallback_router = Router(name="fallback")
+
+
+# Определение состояний для FSM
+class AuthStates(StatesGroup):
+    WAITING_FOR_NAME = State()
+    WAITING_FOR_PHONE = State()
+
+
+# Команда /start
+@router.message(Command("start"))
+async def cmd_start(message: types.Message, state: FSMContext, user_manager):
+    user_id = str(message.from_user.id)
+    user = await user_manager.get_user(user_id)
+    if user:
+        await message.answer(f"Добро пожаловать обратно, {user['name']}! Вы уже авторизованы.\nВыберите действие:", reply_markup=get_main_menu())
+    else:
+        await message.answer("Добро пожаловать! Пожалуйста, введите ваше имя:")
+        await state.set_state(AuthStates.WAITING_FOR_NAME)
+
+
+# Обработка имени
+@router.message(AuthStates.WAITING_FOR_NAME)
+async def process_name(message: types.Message, state: FSMContext):
+    await state.update_data(name=message.text)
+    await message.answer("Спасибо! Теперь введите ваш номер телефона:")
+    await state.set_state(AuthStates.WAITING_FOR_PHONE)
+
+
+# Обработка номера телефона
+@router.message(AuthStates.WAITING_FOR_PHONE)
+async def process_phone(message: types.Message, state: FSMContext, user_manager):
+    user_id = str(message.from_user.id)
+    data = await state.get_data()
+    name = data.get("name")
+    phone = message.text
+    await user_manager.add_user(user_id, name, phone)
+    await message.answer(f"Спасибо, {name}! Вы успешно зарегистрированы.", reply_markup=get_main_menu())
+    await state.clear()
+
+
+@router.callback_query(F.data == "help")
+async def show_help(callback: types.CallbackQuery):
+    await callback.message.answer("ℹ️ *Помощь*\n\n- Используйте /start для регистрации\n- Выберите действие из меню ниже")
+
+
+@router.callback_query(F.data == "about")
+async def show_about(callback: types.CallbackQuery):
+    await callback.message.answer("🤖 *О боте*\n\nKadrovik Bot помогает вам получать актуальную информацию с сайта Kadrovik.uz. Вы можете просматривать последние статьи или искать материалы по ключевым словам.")
+
+
+# Проверка авторизации
+@fallback_router.message()
+async def check_authorization(message: types.Message, user_manager):
+    user_id = str(message.from_user.id)
+    if not await user_manager.get_user(user_id) and message.text != "/start":
+        await message.answer("Пожалуйста, зарегистрируйтесь с помощью /start.")
+
+
+# Неизвестные кнопки (например, из очень старых сообщений): только снимаем "часики"
+@fallback_router.callback_query()
+async def unknown_callback(callback: types.CallbackQuery):
+    pass
@@ -1,11 +1,35 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from settings import SUPPORTED_LANGUAGES
+from utils.languages import language_name
 
 def get_main_menu():
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="Актуальные статьи Kadrovik.uz", callback_data="kadrovik_latest")],
         [InlineKeyboardButton(text="Новости Kadrovik.uz", callback_data="kadrovik_news")],
         [InlineKeyboardButton(text="Поиск по Kadrovik.uz", callback_data="kadrovik_search")],
+        [InlineKeyboardButton(text="🔔 Подписка на новые статьи", callback_data="subscriptions")],
+        [InlineKeyboardButton(text="🌐 Язык статей", callback_data="language")],
         [InlineKeyboardButton(text="Помощь", callback_data="help")],
         [InlineKeyboardButton(text="О боте", callback_data="about")],
     ])
+    return keyboard
+
+def get_subscriptions_menu(subscriptions):
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(
+            text=f"{'✅' if lang in subscriptions else '➕'} {language_name(lang)}",
+            callback_data=f"subscribe:{lang}"
+        )]
+        for lang in SUPPORTED_LANGUAGES
+    ])
+    return keyboard
+
+def get_language_menu(current):
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(
+            text=f"{'✅ ' if lang == current else ''}{language_name(lang)}",
+            callback_data=f"set_language:{lang}"
+        )]
+        for lang in SUPPORTED_LANGUAGES
+    ])
     return keyboard
\ No newline at end of file
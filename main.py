@@ -1,62 +1,25 @@
 import asyncio
-import logging
-import os  # Добавляем импорт os для работы с файлами
-from aiogram import Bot, Dispatcher, types
-from aiogram.filters import Command
-from aiogram.fsm.context import FSMContext
-from aiogram.fsm.state import State, StatesGroup
-from aiogram.fsm.storage.memory import MemoryStorage
-from keyboards import get_main_menu
-from utils.parser import get_latest_articles, search_articles, fetch_article_content
+import os
+from aiogram import Bot, Dispatcher
+from aiogram.utils.callback_answer import CallbackAnswerMiddleware
+from handlers import articles, news, search, settings as settings_handlers, start
+from middlewares import AuthMiddleware, ChatOrderMiddleware, ThrottlingMiddleware, MetricsMiddleware, SendScheduler
+from utils.http import start_http_client, close_http_client
+from utils.storage import warm_cache, close_cache, cache_store
+from utils.search_index import rebuild_index
+from utils.refresher import start_refresher, stop_refresher, warm_languages
+from utils.crawler import start_crawler, stop_crawler
+from utils.archive import archive
+from utils.notifier import Notifier
+from utils.extract import shutdown_parser_pool
+from utils.shared import create_fsm_storage, create_chat_lock, close_redis
+from utils.logs import setup_logging
+from utils.metrics import registry, start_metrics_server
+from utils.profiler import install_profiler_signal
+from utils.singleflight import flight
 from dotenv import load_dotenv
-import json
-
-# Импортируем новые модули (оставляем заглушки)
-try:
-    from news import fetch_news
-except ImportError:
-    async def fetch_news(lang="ru"):
-        return [{"title": "Новость 1", "date": "2025-05-15", "url": "https://example.com"}]
-
-try:
-    from search import search as custom_search
-except ImportError:
-    async def custom_search(query, lang="ru"):
-        return [{"title": f"Результат для {query}", "date": "2025-05-15", "url": "https://example.com"}]
-
-try:
-    from settings import SUPPORTED_LANGUAGES, DEFAULT_LANGUAGE, MAX_ARTICLES
-except ImportError:
-    SUPPORTED_LANGUAGES = ["ru", "uz"]
-    DEFAULT_LANGUAGE = "ru"
-    MAX_ARTICLES = 10
-
-try:
-    from user import UserManager
-except ImportError:
-    class UserManager:
-        def __init__(self):
-            self.users = {}
-            self.load_users()
-
-        def load_users(self):
-            if os.path.exists("users.json"):
-                with open("users.json", "r") as f:
-                    self.users = json.load(f)
-
-        def save_users(self):
-            with open("users.json", "w") as f:
-                json.dump(self.users, f, indent=4)
-
-        def add_user(self, user_id, name, phone):
-            self.users[user_id] = {"name": name, "phone": phone}
-            self.save_users()
-
-        def get_user(self, user_id):
-            return self.users.get(user_id)
-
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
+from user import create_user_repository
+from settings import METRICS_HOST, METRICS_PORT
 
 # Загрузка переменных окружения
 load_dotenv()
@@ -65,156 +28,82 @@ if not BOT_TOKEN:
     raise ValueError("BOT_TOKEN not found in .env file")
 
 # Инициализация бота
-storage = MemoryStorage()
+storage = create_fsm_storage()
 bot = Bot(token=BOT_TOKEN)
 dp = Dispatcher(storage=storage)
 
-# Инициализация менеджера пользователей
-user_manager = UserManager()
-
-# Определение состояний для FSM
-class AuthStates(StatesGroup):
-    WAITING_FOR_NAME = State()
-    WAITING_FOR_PHONE = State()
-
-class SearchStates(StatesGroup):
-    WAITING_FOR_QUERY = State()
-
-# Хранилище последних статей
-latest_articles = []
-
-# Команда /start
-@dp.message(Command("start"))
-async def cmd_start(message: types.Message, state: FSMContext):
-    user_id = str(message.from_user.id)
-    user = user_manager.get_user(user_id)
-    if user:
-        await message.answer(f"Добро пожаловать обратно, {user['name']}! Вы уже авторизованы.\nВыберите действие:", reply_markup=get_main_menu())
-    else:
-        await message.answer("Добро пожаловать! Пожалуйста, введите ваше имя:")
-        await state.set_state(AuthStates.WAITING_FOR_NAME)
-
-# Обработка имени
-@dp.message(AuthStates.WAITING_FOR_NAME)
-async def process_name(message: types.Message, state: FSMContext):
-    await state.update_data(name=message.text)
-    await message.answer("Спасибо! Теперь введите ваш номер телефона:")
-    await state.set_state(AuthStates.WAITING_FOR_PHONE)
-
-# Обработка номера телефона
-@dp.message(AuthStates.WAITING_FOR_PHONE)
-async def process_phone(message: types.Message, state: FSMContext):
-    user_id = str(message.from_user.id)
-    data = await state.get_data()
-    name = data.get("name")
-    phone = message.text
-    user_manager.add_user(user_id, name, phone)
-    await message.answer(f"Спасибо, {name}! Вы успешно зарегистрированы.", reply_markup=get_main_menu())
-    await state.clear()
-
-# Обработка callback-запросов от кнопок
-@dp.callback_query()
-async def process_callback(callback: types.CallbackQuery, state: FSMContext):
-    user_id = str(callback.from_user.id)
-    user = user_manager.get_user(user_id)
-    if not user:
-        await callback.message.answer("Пожалуйста, зарегистрируйтесь с помощью /start.")
-        await callback.answer()
-        return
-
-    global latest_articles
-
-    if callback.data == "kadrovik_latest":
-        articles = await get_latest_articles(DEFAULT_LANGUAGE)
-        if articles:
-            latest_articles = articles[:MAX_ARTICLES]
-            response = "📰 Последние статьи с Kadrovik.uz:\n\n"
-            for i, article in enumerate(latest_articles, 1):
-                response += f"{i}. {article['emoji']} *{article['title']}*\n📅 {article['date']}\n\n"
-            
-            buttons = [
-                [types.InlineKeyboardButton(text=f"{i} Статья", callback_data=f"article_{i-1}")]
-                for i in range(1, len(latest_articles) + 1)
-            ]
-            keyboard = types.InlineKeyboardMarkup(inline_keyboard=buttons)
-            await callback.message.answer(response, parse_mode="Markdown", reply_markup=keyboard)
-        else:
-            await callback.message.answer("Не удалось загрузить статьи. Попробуйте позже.")
-    
-    elif callback.data.startswith("article_"):
-        article_index = int(callback.data.split("_")[1])
-        if 0 <= article_index < len(latest_articles):
-            article = latest_articles[article_index]
-            content = await fetch_article_content(article['url'])
-            if content:
-                # Создаём текстовый файл с содержимым статьи
-                filename = f"article_{article_index}.txt"
-                with open(filename, "w", encoding="utf-8") as f:
-                    f.write(content)
-                
-                # Отправляем файл
-                with open(filename, "rb") as f:
-                    await callback.message.answer_document(
-                        document=f,
-                        caption=f"📰 *{article['title']}*\n📅 {article['date']}",
-                        parse_mode="Markdown"
-                    )
-                
-                # Удаляем временный файл
-                os.remove(filename)
-            else:
-                logging.warning(f"Не удалось загрузить содержимое статьи: {article['url']}")
-                await callback.message.answer("Не удалось загрузить содержимое статьи.")
-        else:
-            await callback.message.answer("Статья не найдена.")
-
-    elif callback.data == "kadrovik_search":
-        await callback.message.answer("Введите запрос для поиска статей на Kadrovik.uz:")
-        await state.set_state(SearchStates.WAITING_FOR_QUERY)
-    elif callback.data == "help":
-        await callback.message.answer("ℹ️ *Помощь*\n\n- Используйте /start для регистрации\n- Выберите действие из меню ниже")
-    elif callback.data == "about":
-        await callback.message.answer("🤖 *О боте*\n\nKadrovik Bot помогает вам получать актуальную информацию с сайта Kadrovik.uz. Вы можете просматривать последние статьи или искать материалы по ключевым словам.")
-    elif callback.data == "kadrovik_news":
-        news = await fetch_news(DEFAULT_LANGUAGE)
-        if news:
-            response = "🔔 Последние новости:\n\n"
-            for item in news[:MAX_ARTICLES]:
-                response += f"📢 *{item['title']}*\n📅 {item['date']}\n🔗 {item['url']}\n\n"
-            await callback.message.answer(response, parse_mode="Markdown")
-        else:
-            await callback.message.answer("Не удалось загрузить новости. Попробуйте позже.")
-    await callback.answer()
-
-# Обработка поискового запроса
-@dp.message(SearchStates.WAITING_FOR_QUERY)
-async def process_search_query(message: types.Message, state: FSMContext):
-    query = message.text
-    articles = await search_articles(query, DEFAULT_LANGUAGE)
-    if articles:
-        response = f"📰 Результаты поиска по запросу '{query}':\n\n"
-        for article in articles[:MAX_ARTICLES]:
-            response += f"{article['emoji']} *{article['title']}*\n📅 {article['date']}\n🔗 {article['url']}\n\n"
-        await message.answer(response, parse_mode="Markdown")
-    else:
-        custom_results = await custom_search(query, DEFAULT_LANGUAGE)
-        if custom_results:
-            response = f"📰 Результаты поиска (альтернативный метод) по запросу '{query}':\n\n"
-            for result in custom_results[:MAX_ARTICLES]:
-                response += f"📢 *{result['title']}*\n📅 {result['date']}\n🔗 {result['url']}\n\n"
-            await message.answer(response, parse_mode="Markdown")
-        else:
-            await message.answer(f"По запросу '{query}' ничего не найдено.")
-    await state.clear()
-
-# Проверка авторизации
-@dp.message()
-async def check_authorization(message: types.Message):
-    user_id = str(message.from_user.id)
-    if not user_manager.get_user(user_id) and message.text != "/start":
-        await message.answer("Пожалуйста, зарегистрируйтесь с помощью /start.")
-
-# Запуск бота
+# Инициализация менеджера пользователей (обработчики получают его аргументом user_manager)
+user_manager = create_user_repository()
+dp["user_manager"] = user_manager
+notifier = Notifier(bot, user_manager)
+
+dp.update.outer_middleware(ChatOrderMiddleware(chat_lock=create_chat_lock()))
+throttling = ThrottlingMiddleware()
+dp.callback_query.outer_middleware(throttling)
+dp.callback_query.middleware(MetricsMiddleware())
+dp.message.middleware(MetricsMiddleware())
+# Ответ на нажатие кнопки ("часики") отправляется после обработчика, в том числе при отказе
+dp.callback_query.middleware(CallbackAnswerMiddleware())
+dp.callback_query.middleware(AuthMiddleware(user_manager))
+
+# Порядок важен: /start и регистрация раньше поиска, общий обработчик - последним
+dp.include_routers(
+    start.router,
+    articles.router,
+    news.router,
+    search.router,
+    settings_handlers.router,
+    start.fallback_router,
+)
+
+# Все исходящие сообщения проходят через очередь с лимитами Telegram
+send_scheduler = SendScheduler()
+bot.session.middleware(send_scheduler)
+
+# Метрики, которые считаются в момент запроса /metrics
+registry.gauge("kadrovik_send_queue_depth", "Сообщений в очереди отправки", lambda: send_scheduler.depth)
+registry.gauge("kadrovik_callbacks_throttled", "Отклонённых частых нажатий", lambda: throttling.throttled)
+registry.gauge("kadrovik_singleflight", "Статистика single-flight", lambda: flight.stats, label="kind")
+metrics_runner = None
+
+# Общий HTTP-клиент и кэш живут столько же, сколько бот.
+# worker_index передаёт webhook.py: фоновое обновление ленты нужно только в одном процессе
+async def on_startup(worker_index=0):
+    global metrics_runner
+    # Логирование настраивается в каждом процессе (в webhook-процессах - после fork)
+    setup_logging()
+    install_profiler_signal()
+    if METRICS_PORT:
+        # У каждого webhook-процесса свой порт метрик
+        metrics_runner = await start_metrics_server(METRICS_HOST, METRICS_PORT + worker_index)
+    await start_http_client()
+    await warm_cache()
+    await rebuild_index(await cache_store.items(), archive.items())
+    await user_manager.start()
+    # Ленты всех языков - до приёма апдейтов: смена языка не ждёт сайта
+    await warm_languages()
+    if worker_index == 0:
+        start_refresher(on_new_articles=notifier.schedule)
+        start_crawler()
+
+async def on_shutdown():
+    await stop_refresher()
+    await notifier.close()
+    await stop_crawler()
+    await close_http_client()
+    await close_cache()
+    await archive.close()
+    await user_manager.close()
+    shutdown_parser_pool()
+    await close_redis()
+    await send_scheduler.close()
+    if metrics_runner is not None:
+        await metrics_runner.cleanup()
+
+dp.startup.register(on_startup)
+dp.shutdown.register(on_shutdown)
+
+# Запуск бота (long polling; webhook-режим - webhook.py)
 async def main():
     await dp.start_polling(bot)
 
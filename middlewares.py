@@ -0,0 +1,290 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from settings import (
+    UPDATES_CONCURRENCY, CHAT_MAX_PENDING, CALLBACK_RATE, CALLBACK_BURST,
+    SEND_GLOBAL_RATE, SEND_CHAT_RATE, SEND_CHAT_BURST, SEND_MAX_RETRIES,
+)
+from utils.metrics import HANDLER_LATENCY, SEND_LATENCY, SEND_QUEUE_WAIT, SEND_RETRIES
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты исходящих сообщений: ответы пользователям раньше массовых рассылок
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+send_priority = ContextVar("send_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def bulk_sends():
+    """Сообщения, отправленные внутри блока, идут с низким приоритетом (рассылки)."""
+    token = send_priority.set(PRIORITY_BULK)
+    try:
+        yield
+    finally:
+        send_priority.reset(token)
+
+
+class TokenBucket:
+    """Маркерная корзина: rate маркеров в секунду, не больше capacity."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now=None):
+        """Сколько секунд ждать до следующего маркера (0 - можно сейчас)."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def full(self, now=None):
+        self.delay(now)
+        return self.tokens >= self.capacity
+
+
+class ChatOrderMiddleware(BaseMiddleware):
+    """Апдейты обрабатываются параллельно, но внутри одного чата - строго по очереди.
+
+    Всего одновременно обрабатывается не больше max_concurrent апдейтов, а очередь
+    одного чата ограничена max_pending: лишние апдейты (например, многократные
+    нажатия одной кнопки) отбрасываются.
+
+    chat_lock (utils.shared.SharedChatLock) - то же для нескольких процессов: пока апдейт
+    чата обрабатывается в одном процессе, другие ждут.
+    """
+
+    def __init__(self, max_concurrent=UPDATES_CONCURRENCY, max_pending=CHAT_MAX_PENDING, chat_lock=None):
+        self.max_pending = max_pending
+        self.chat_lock = chat_lock
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._chats = {}  # chat_id -> [lock, число апдейтов в очереди]
+
+    async def __call__(self, handler, event, data):
+        chat = data.get("event_chat")
+        if chat is None:
+            async with self._semaphore:
+                return await handler(event, data)
+
+        slot = self._chats.get(chat.id)
+        if slot is None:
+            slot = self._chats[chat.id] = [asyncio.Lock(), 0]
+        if slot[1] >= self.max_pending:
+            logger.warning("Очередь чата переполнена, апдейт пропущен", extra={"chat_id": chat.id})
+            return None
+
+        slot[1] += 1
+        try:
+            # Сначала очередь чата, потом общий лимит: ждущий чат не занимает слот
+            async with slot[0]:
+                if self.chat_lock is None:
+                    async with self._semaphore:
+                        return await handler(event, data)
+                async with self.chat_lock.hold(chat.id):
+                    async with self._semaphore:
+                        return await handler(event, data)
+        finally:
+            slot[1] -= 1
+            if slot[1] == 0:
+                del self._chats[chat.id]
+
+
+def callback_type(data):
+    """Тип кнопки без параметров: "article:ab12" -> "article", "latest_page:ru:1" -> "latest_page"."""
+    kind = (data or "").split(":", 1)[0]
+    return re.sub(r"_\d+$", "", kind)
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """Замеряет время работы обработчиков (для кнопок - по типу callback_data)."""
+
+    async def __call__(self, handler, event, data):
+        kind = callback_type(event.data) if isinstance(event, CallbackQuery) else type(event).__name__.lower()
+        with HANDLER_LATENCY.time(handler=kind):
+            return await handler(event, data)
+
+
+class AuthMiddleware(BaseMiddleware):
+    """Кнопки работают только для зарегистрированных пользователей.
+
+    Запись пользователя передаётся обработчику аргументом user.
+    """
+
+    def __init__(self, users):
+        self.users = users
+
+    async def __call__(self, handler, event, data):
+        user = await self.users.get_user(str(event.from_user.id))
+        if not user:
+            await event.message.answer("Пожалуйста, зарегистрируйтесь с помощью /start.")
+            return None
+        data["user"] = user
+        return await handler(event, data)
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Ограничивает частоту нажатий кнопок одним пользователем."""
+
+    def __init__(self, rate=CALLBACK_RATE, burst=CALLBACK_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.throttled = 0
+        self._buckets = {}  # user_id -> TokenBucket
+
+    async def __call__(self, handler, event, data):
+        user = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+
+        now = time.monotonic()
+        bucket = self._buckets.get(user.id)
+        if bucket is None:
+            if len(self._buckets) > 10000:
+                self._buckets = {uid: b for uid, b in self._buckets.items() if not b.full(now)}
+            bucket = self._buckets[user.id] = TokenBucket(self.rate, self.burst)
+        if bucket.delay(now) > 0:
+            self.throttled += 1
+            await event.answer("Слишком часто. Подождите немного.")
+            return None
+        bucket.take()
+        return await handler(event, data)
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """Очередь исходящих сообщений бота с учётом лимитов Telegram.
+
+    Общий лимит (около 30 сообщений в секунду) и лимит на чат (около 1 в секунду,
+    с небольшим запасом) - маркерные корзины. Ответы пользователям идут раньше
+    рассылок (см. bulk_sends). При 429 бот ждёт retry_after и повторяет запрос.
+    """
+
+    def __init__(self, global_rate=SEND_GLOBAL_RATE, chat_rate=SEND_CHAT_RATE,
+                 chat_burst=SEND_CHAT_BURST, max_retries=SEND_MAX_RETRIES):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.paused_until = 0.0
+        self._buckets = {}    # chat_id -> TokenBucket
+        self._queues = {}     # chat_id -> heap[(priority, seq, future)]
+        self._ready = []      # heap[(priority, seq, chat_id)] - чаты, которые можно обслужить
+        self._waiting = []    # heap[(ready_at, chat_id)] - чаты, исчерпавшие свой лимит
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self.depth = 0
+
+    @staticmethod
+    def _is_send(method):
+        return getattr(method, "chat_id", None) is not None and type(method).__name__.startswith(
+            ("Send", "Edit", "Copy", "Forward")
+        )
+
+    async def __call__(self, make_request, bot, method):
+        name = type(method).__name__
+        if not self._is_send(method):
+            with SEND_LATENCY.time(method=name):
+                return await make_request(bot, method)
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(method.chat_id, send_priority.get())
+            try:
+                with SEND_LATENCY.time(method=name):
+                    return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt >= self.max_retries:
+                    raise
+                SEND_RETRIES.inc()
+                self.paused_until = max(self.paused_until, time.monotonic() + e.retry_after)
+                logger.warning("Лимит Telegram, пауза", extra={"retry_after": e.retry_after})
+
+    async def _acquire(self, chat_id, priority):
+        future = asyncio.get_running_loop().create_future()
+        seq = next(self._seq)
+        heapq.heappush(self._queues.setdefault(chat_id, []), (priority, seq, future))
+        heapq.heappush(self._ready, (priority, seq, chat_id))
+        self.depth += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._pump())
+        self._wakeup.set()
+
+        enqueued = time.monotonic()
+        await future
+        wait = time.monotonic() - enqueued
+        SEND_QUEUE_WAIT.observe(wait, priority="bulk" if priority == PRIORITY_BULK else "interactive")
+
+    def _bucket(self, chat_id, now):
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            if len(self._buckets) > 10000:
+                self._buckets = {
+                    cid: b for cid, b in self._buckets.items() if cid in self._queues or not b.full(now)
+                }
+            bucket = self._buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    async def _pump(self):
+        """Выдаёт разрешения на отправку по приоритету и лимитам."""
+        while True:
+            now = time.monotonic()
+            while self._waiting and self._waiting[0][0] <= now:
+                _, chat_id = heapq.heappop(self._waiting)
+                queue = self._queues.get(chat_id)
+                if queue:
+                    heapq.heappush(self._ready, (queue[0][0], queue[0][1], chat_id))
+
+            if not self._ready:
+                timeout = self._waiting[0][0] - now if self._waiting else None
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            delay = max(self.paused_until - now, self.global_bucket.delay(now))
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            _, _, chat_id = heapq.heappop(self._ready)
+            queue = self._queues.get(chat_id)
+            if not queue:
+                continue  # устаревшая запись, очередь чата уже пуста
+            bucket = self._bucket(chat_id, now)
+            chat_delay = bucket.delay(now)
+            if chat_delay > 0:
+                heapq.heappush(self._waiting, (now + chat_delay, chat_id))
+                continue
+
+            _, _, future = heapq.heappop(queue)
+            if not queue:
+                del self._queues[chat_id]
+            self.depth -= 1
+            if future.done():
+                continue  # отправитель отменил ожидание
+            bucket.take()
+            self.global_bucket.take()
+            future.set_result(None)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,7 @@
+from settings import MAX_ARTICLES
+from utils.search_index import search_index, normalize_query
+
+# Альтернативный поиск для main.py: нестрогий (по префиксам слов) поиск по локальному индексу
+
+async def search(query, lang="ru"):
+    return search_index.search(normalize_query(query), lang, limit=MAX_ARTICLES, prefix=True)
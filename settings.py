@@ -0,0 +1,112 @@
+import os
+from dotenv import load_dotenv
+
+# Настройки бота (значения можно переопределить через .env)
+load_dotenv()
+
+SUPPORTED_LANGUAGES = ["ru", "uz"]
+DEFAULT_LANGUAGE = "ru"
+MAX_ARTICLES = 10
+
+# Адрес сайта (для бенчмарков - локальная копия, см. benchmarks/)
+KADROVIK_BASE_URL = os.getenv("KADROVIK_BASE_URL", "https://kadrovik.uz/").rstrip("/") + "/"
+
+# HTTP-клиент для запросов к Kadrovik.uz
+HTTP_USER_AGENT = os.getenv(
+    "HTTP_USER_AGENT",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "100"))
+HTTP_LIMIT_PER_HOST = int(os.getenv("HTTP_LIMIT_PER_HOST", "10"))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", "10"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+# Потоковая загрузка статей: размер порции и предел размера страницы
+HTTP_STREAM_CHUNK = int(os.getenv("HTTP_STREAM_CHUNK", "16384"))
+HTTP_MAX_PAGE_BYTES = int(os.getenv("HTTP_MAX_PAGE_BYTES", str(2 * 1024 * 1024)))
+
+# Кэш результатов парсинга
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "cache.db")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+CACHE_TTL = int(os.getenv("CACHE_TTL", str(7 * 24 * 3600)))
+
+# Фоновое обновление ленты последних статей
+LATEST_REFRESH_INTERVAL = int(os.getenv("LATEST_REFRESH_INTERVAL", "900"))
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "3"))
+
+# Локальная копия архива статей и её обходчик
+ARCHIVE_DB_PATH = os.getenv("ARCHIVE_DB_PATH", "archive.db")
+CRAWL_INTERVAL = int(os.getenv("CRAWL_INTERVAL", "3600"))      # 0 - не обходить архив
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "2"))
+CRAWL_DELAY = float(os.getenv("CRAWL_DELAY", "1"))             # пауза после каждого запроса, с
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "20"))      # страниц ленты за один проход
+CRAWL_MAX_ATTEMPTS = int(os.getenv("CRAWL_MAX_ATTEMPTS", "3"))  # попыток загрузить текст статьи
+
+# Разбор HTML: движок (lxml / html.parser) и пул вне event loop (thread / process)
+PARSE_ENGINE = os.getenv("PARSE_ENGINE", "lxml")
+PARSE_EXECUTOR = os.getenv("PARSE_EXECUTOR", "thread")
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "2"))
+
+# Локальный поиск: сколько результатов индекса достаточно, чтобы не ходить на сайт
+SEARCH_MIN_RESULTS = int(os.getenv("SEARCH_MIN_RESULTS", "3"))
+
+# Хранилище пользователей
+USER_BACKEND = os.getenv("USER_BACKEND", "sqlite")
+USERS_DB_PATH = os.getenv("USERS_DB_PATH", "users.db")
+USERS_CACHE_SIZE = int(os.getenv("USERS_CACHE_SIZE", "10000"))
+USERS_FLUSH_INTERVAL = float(os.getenv("USERS_FLUSH_INTERVAL", "1"))
+USERS_FLUSH_BATCH = int(os.getenv("USERS_FLUSH_BATCH", "500"))
+
+# Общие хранилища для нескольких процессов (webhook-режим)
+# REDIS_URL=memory:// - локальная замена Redis внутри одного процесса
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+FSM_STORAGE = os.getenv("FSM_STORAGE", "memory")        # memory / redis
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")    # sqlite / redis
+FLIGHT_BACKEND = os.getenv("FLIGHT_BACKEND", "local")   # local / redis
+FLIGHT_LOCK_TTL = float(os.getenv("FLIGHT_LOCK_TTL", "30"))
+
+# Webhook-режим (python webhook.py)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "1"))
+# Сколько секунд процесс доверяет своему кэшу пользователей. При нескольких процессах
+# по умолчанию кэш выключен: иначе язык и подписки, изменённые в другом процессе, видны с опозданием
+USERS_CACHE_TTL = float(os.getenv("USERS_CACHE_TTL", "300" if WEBHOOK_WORKERS <= 1 else "0"))
+
+# Параллельная обработка апдейтов с сохранением порядка внутри чата
+UPDATES_CONCURRENCY = int(os.getenv("UPDATES_CONCURRENCY", "100"))
+CHAT_MAX_PENDING = int(os.getenv("CHAT_MAX_PENDING", "10"))
+# При FSM_STORAGE=redis апдейты одного чата не обрабатываются одновременно в разных процессах;
+# блокировка чата в Redis снимается не позже чем через CHAT_LOCK_TTL секунд
+CHAT_LOCK_TTL = float(os.getenv("CHAT_LOCK_TTL", "60"))
+
+# Сколько статей на одной странице списка
+ARTICLES_PAGE_SIZE = int(os.getenv("ARTICLES_PAGE_SIZE", "5"))
+# Как отправлять статью: document - файлом, text - сообщениями по мере загрузки
+ARTICLE_DELIVERY = os.getenv("ARTICLE_DELIVERY", "document")
+
+# Ограничение частоты: нажатия кнопок одним пользователем и исходящие сообщения
+CALLBACK_RATE = float(os.getenv("CALLBACK_RATE", "1"))
+CALLBACK_BURST = int(os.getenv("CALLBACK_BURST", "3"))
+SEND_GLOBAL_RATE = float(os.getenv("SEND_GLOBAL_RATE", "30"))
+SEND_CHAT_RATE = float(os.getenv("SEND_CHAT_RATE", "1"))
+SEND_CHAT_BURST = int(os.getenv("SEND_CHAT_BURST", "3"))
+SEND_MAX_RETRIES = int(os.getenv("SEND_MAX_RETRIES", "3"))
+
+# Рассылка новых статей подписчикам: сколько отправок ставится в очередь за раз
+NOTIFY_BATCH = int(os.getenv("NOTIFY_BATCH", "500"))
+
+# Логи, метрики и профилирование
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")            # text / json
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))   # 0 - не запускать /metrics
+PROFILE_SECONDS = float(os.getenv("PROFILE_SECONDS", "10"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", ".")
@@ -0,0 +1,137 @@
+import asyncio
+import json
+from types import SimpleNamespace
+import pytest
+from utils import storage
+from utils.storage import CacheStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Управляемое время для utils.storage (срок жизни записей считается по time.time)."""
+    now = [1_000_000.0]
+    monkeypatch.setattr(storage, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_entry_expires_after_ttl(tmp_path, clock):
+    async def scenario():
+        store = CacheStore(path=str(tmp_path / "cache.db"), default_ttl=100)
+        await store.set("short", {"data": 1}, ttl=10)
+        await store.set("default", {"data": 2})
+        await store.set("forever", {"data": 3}, ttl=0)
+        clock[0] += 11
+        short, default = await store.get("short"), await store.get("default")
+        clock[0] += 100
+        late = await store.get("default"), await store.get("forever")
+        await store.close()
+        return short, default, late
+
+    short, default, late = run(scenario())
+    assert short is None
+    assert default == {"data": 2}
+    assert late == (None, {"data": 3})
+
+
+def test_expired_rows_are_not_loaded_after_restart(tmp_path, clock):
+    path = str(tmp_path / "cache.db")
+
+    async def write():
+        store = CacheStore(path=path)
+        await store.set("old", {"data": 1}, ttl=10)
+        await store.set("fresh", {"data": 2}, ttl=1000)
+        await store.close()
+
+    async def read():
+        store = CacheStore(path=path)
+        result = dict(await store.items()) if await store.get("fresh") else {}
+        await store.close()
+        return result
+
+    run(write())
+    clock[0] += 20
+    assert run(read()) == {"fresh": {"data": 2}}
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    path = str(tmp_path / "cache.db")
+
+    async def scenario():
+        store = CacheStore(path=path, max_entries=2)
+        await store.set("a", 1)
+        await store.set("b", 2)
+        await store.get("a")        # "a" использовалась позже "b"
+        await store.set("c", 3)     # вытесняется "b"
+        result = [await store.get(key) for key in ("a", "b", "c")]
+        await store.close()
+
+        # Вытесненная запись удалена и из базы
+        reopened = CacheStore(path=path, max_entries=2)
+        await reopened.warm()
+        keys = sorted(key for key, _ in await reopened.items())
+        await reopened.close()
+        return result, keys
+
+    result, keys = run(scenario())
+    assert result == [1, None, 3]
+    assert keys == ["a", "c"]
+
+
+def test_items_filters_by_prefix_and_skips_expired(tmp_path, clock):
+    async def scenario():
+        store = CacheStore(path=str(tmp_path / "cache.db"))
+        await store.set("article_1", "x", ttl=1000)
+        await store.set("article_2", "y", ttl=5)
+        await store.set("latest_ru", [], ttl=1000)
+        clock[0] += 10
+        items = await store.items("article_")
+        await store.close()
+        return items
+
+    assert run(scenario()) == [("article_1", "x")]
+
+
+def test_reads_decide_what_is_loaded_after_restart(tmp_path, clock):
+    path = str(tmp_path / "cache.db")
+
+    async def write():
+        store = CacheStore(path=path)
+        for key in ("a", "b", "c"):
+            await store.set(key, key)
+            clock[0] += 1
+        await store.get("a")        # записана раньше всех, но прочитана последней
+        await store.close()
+
+    async def read():
+        store = CacheStore(path=path, max_entries=2)
+        await store.warm()
+        keys = sorted(key for key, _ in await store.items())
+        await store.close()
+        return keys
+
+    run(write())
+    assert run(read()) == ["a", "c"]
+
+
+def test_legacy_file_is_migrated_once(tmp_path, clock, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "cache.json").write_text(json.dumps({"latest_ru": {"data": []}}))
+    path = str(tmp_path / "cache.db")
+
+    async def load():
+        store = CacheStore(path=path, default_ttl=100)
+        await store.warm()
+        keys = [key for key, _ in await store.items()]
+        await store.close()
+        return keys
+
+    assert run(load()) == ["latest_ru"]
+    assert not (tmp_path / "cache.json").exists()
+    assert (tmp_path / "cache.json.migrated").exists()
+    # Записи истекли - старый файл не переносится заново со свежим сроком
+    clock[0] += 200
+    assert run(load()) == []
@@ -0,0 +1,79 @@
+from pathlib import Path
+import pytest
+from utils.extract import HAS_LXML, check_fixtures, extract_article_content, iter_article_paragraphs
+
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures"
+
+
+def stream(html, size=7):
+    """Потоковый разбор порциями по size символов (границы режут теги и текст)."""
+    chunks = (html[i:i + size] for i in range(0, len(html), size))
+    return "".join(iter_article_paragraphs(chunks))
+
+
+PAGES = {
+    "header_before_block": """
+        <h1>Отпуск</h1><time class="longread-post__time-published" datetime="2025-01-02">2 января</time>
+        <section class="longread-block"><p>Первый абзац.</p><strong>Важно</strong><p>Второй.</p></section>
+        <footer><p>Подвал</p></footer>""",
+    "time_inside_block": """
+        <h1>Отпуск</h1>
+        <section class="longread-block">
+          <time class="longread-post__time-published" datetime="2025-01-02">2 января</time>
+          <p>Первый абзац.</p><p>Второй абзац.</p>
+        </section>""",
+    "h1_after_block": """
+        <time class="longread-post__time-published" datetime="2025-01-02">2 января</time>
+        <section class="longread-block"><p>Первый абзац.</p><strong>Важно</strong></section>
+        <h1>Заголовок в конце</h1>""",
+    "no_header": """
+        <section class="longread-block"><p>Только текст.</p></section><p>Подвал</p>""",
+    "unclosed_p": """
+        <h1>Т</h1><time class="longread-post__time-published" datetime="2025-01-02"></time>
+        <section class="longread-block"><p>one<p>two<strong>b</strong></section>""",
+    "empty_h1": """
+        <h1> </h1><time class="longread-post__time-published" datetime="2025-01-02"></time>
+        <section class="longread-block"><p>Текст.</p></section>""",
+}
+
+
+@pytest.mark.parametrize("name", sorted(PAGES))
+def test_stream_matches_reference(name):
+    html = PAGES[name]
+    reference = extract_article_content(html, engine="html.parser", partial=False)
+    assert stream(html) == reference
+
+
+def test_time_inside_block_keeps_date():
+    text = stream(PAGES["time_inside_block"])
+    assert text.startswith("📰 Отпуск📅 2025-01-02\nПервый абзац.")
+
+
+def test_h1_after_block_keeps_title():
+    text = stream(PAGES["h1_after_block"])
+    assert text.startswith("📰 Заголовок в конце📅 2025-01-02\nПервый абзац.")
+
+
+def test_stream_stops_after_block_when_header_known():
+    html = PAGES["header_before_block"]
+    read = []
+
+    def chunks():
+        for i in range(0, len(html), 7):
+            read.append(i)
+            yield html[i:i + 7]
+
+    "".join(iter_article_paragraphs(chunks()))
+    assert read[-1] < html.index("<footer>")
+
+
+@pytest.mark.skipif(not HAS_LXML, reason="lxml не установлен")
+def test_lxml_closes_unclosed_paragraphs():
+    # Известное расхождение: lxml закрывает <p> как браузер, html.parser вкладывает абзацы
+    html = PAGES["unclosed_p"]
+    assert extract_article_content(html, engine="html.parser").endswith("\none two b\ntwo b\n🔹 b\n")
+    assert extract_article_content(html, engine="lxml").endswith("\none\ntwo b\n🔹 b\n")
+
+
+def test_fixtures_match_reference(capsys):
+    assert check_fixtures(FIXTURES), capsys.readouterr().out
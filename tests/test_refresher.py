@@ -0,0 +1,18 @@
+import asyncio
+from utils import refresher
+
+
+def test_notified_list_does_not_expire(monkeypatch):
+    saved = {}
+
+    async def load_cache(key):
+        return saved.get(key) and {"data": saved[key][0]}
+
+    async def save_cache(key, data, ttl=None, **meta):
+        saved[key] = (data, ttl)
+
+    monkeypatch.setattr(refresher, "load_cache", load_cache)
+    monkeypatch.setattr(refresher, "save_cache", save_cache)
+    asyncio.run(refresher.mark_notified("ru", [{"url": "https://kadrovik.uz/a"}]))
+    asyncio.run(refresher.mark_notified("ru", [{"url": "https://kadrovik.uz/b"}]))
+    assert saved["notified_ru"] == (["https://kadrovik.uz/b", "https://kadrovik.uz/a"], 0)
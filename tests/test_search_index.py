@@ -0,0 +1,51 @@
+import asyncio
+from utils import parser
+from utils.search_index import SearchIndex
+
+
+def test_title_update_keeps_body_terms():
+    index = SearchIndex("ru")
+    index.add("https://kadrovik.uz/a", body="Расчёт отпускных за 2025 год")
+    index.add("https://kadrovik.uz/a", title="Отпуск", date="2025-01-02")
+
+    fresh = SearchIndex("ru")
+    fresh.add("https://kadrovik.uz/a", title="Отпуск", date="2025-01-02", body="Расчёт отпускных за 2025 год")
+
+    assert index.postings == fresh.postings
+    assert index.lengths == fresh.lengths
+    assert "body" not in index.docs["https://kadrovik.uz/a"]
+
+
+def test_same_body_is_not_reindexed():
+    index = SearchIndex("ru")
+    index.add("https://kadrovik.uz/a", body="Текст статьи")
+    terms = index.doc_terms["https://kadrovik.uz/a"]
+    index.add("https://kadrovik.uz/a", body="Текст статьи")
+    assert index.doc_terms["https://kadrovik.uz/a"] is terms
+
+
+def test_match_all_requires_every_term():
+    index = SearchIndex("ru")
+    index.add("https://kadrovik.uz/a", title="Отпуск в 2025 году")
+    index.add("https://kadrovik.uz/b", title="Налоги 2025")
+    assert len(index.search("отпуск 2025")) == 2
+    assert [doc["url"] for doc in index.search("отпуск 2025", match_all=True)] == ["https://kadrovik.uz/a"]
+
+
+def test_site_gets_original_query_as_param(monkeypatch):
+    calls = []
+
+    async def fetch_conditional(url, etag=None, last_modified=None, timeout=None, params=None):
+        calls.append((url, params))
+        return "<html></html>", None, None
+
+    async def save_cache(key, data, ttl=None, **meta):
+        calls.append(key)
+
+    monkeypatch.setattr(parser, "fetch_conditional", fetch_conditional)
+    monkeypatch.setattr(parser, "save_cache", save_cache)
+    asyncio.run(parser.fetch_articles_from_site("Ёлка & O‘zbek", "ru"))
+    assert calls == [
+        (parser.site_url("ru") + "search", {"q": "Ёлка & O‘zbek"}),
+        "search_елка & o'zbek_ru",
+    ]
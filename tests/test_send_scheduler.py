@@ -0,0 +1,103 @@
+import asyncio
+import time
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+from middlewares import SendScheduler, TokenBucket, bulk_sends
+from utils.metrics import SEND_RETRIES
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(rate=2, capacity=2)
+    now = bucket.updated
+    bucket.take()
+    bucket.take()
+    assert bucket.delay(now) == 0.5
+    assert bucket.delay(now + 0.5) == 0
+    assert bucket.full(now + 10)
+
+
+def test_retry_after_pauses_and_requeues():
+    async def scenario():
+        scheduler = SendScheduler(global_rate=100, chat_rate=100, chat_burst=100, max_retries=2)
+        calls = []
+
+        async def make_request(bot, method):
+            calls.append((method.chat_id, time.monotonic()))
+            if len(calls) == 1:
+                raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=1)
+            return method.chat_id
+
+        start = time.monotonic()
+        first = asyncio.create_task(scheduler(make_request, None, SendMessage(chat_id=1, text="a")))
+        await asyncio.sleep(0.1)
+        # Пауза после 429 общая: сообщение в другой чат тоже ждёт
+        second = asyncio.create_task(scheduler(make_request, None, SendMessage(chat_id=2, text="b")))
+        assert await first == 1
+        assert await second == 2
+        return start, calls, scheduler
+
+    retried = SEND_RETRIES.values[()]
+    start, calls, scheduler = asyncio.run(scenario())
+    assert [chat_id for chat_id, _ in calls] == [1, 1, 2]
+    assert all(at - start >= 1 for _, at in calls[1:])
+    assert SEND_RETRIES.values[()] - retried == 1
+
+
+def test_retry_after_gives_up_after_max_retries():
+    async def scenario():
+        scheduler = SendScheduler(max_retries=0)
+
+        async def make_request(bot, method):
+            raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=1)
+
+        await scheduler(make_request, None, SendMessage(chat_id=1, text="a"))
+
+    with pytest.raises(TelegramRetryAfter):
+        asyncio.run(scenario())
+
+
+def test_interactive_sends_go_before_bulk():
+    async def scenario():
+        scheduler = SendScheduler(global_rate=20, chat_rate=100, chat_burst=100)
+        # Общий лимит исчерпан: все сообщения встают в очередь
+        scheduler.global_bucket.tokens = 0
+        order = []
+
+        async def make_request(bot, method):
+            order.append(method.text)
+
+        def send(chat_id, text):
+            return asyncio.create_task(scheduler(make_request, None, SendMessage(chat_id=chat_id, text=text)))
+
+        with bulk_sends():
+            bulk = [send(chat_id, f"bulk{chat_id}") for chat_id in range(1, 6)]
+        await asyncio.sleep(0)
+        interactive = send(100, "reply")
+        await asyncio.gather(*bulk, interactive)
+        return order
+
+    order = asyncio.run(scenario())
+    assert order[0] == "reply"
+    assert order[1:] == [f"bulk{chat_id}" for chat_id in range(1, 6)]
+
+
+def test_chat_limit_does_not_block_other_chats():
+    async def scenario():
+        scheduler = SendScheduler(global_rate=100, chat_rate=1, chat_burst=1)
+        sent = {}
+
+        async def make_request(bot, method):
+            sent[method.text] = time.monotonic()
+
+        start = time.monotonic()
+        await asyncio.gather(*(
+            scheduler(make_request, None, SendMessage(chat_id=chat_id, text=text))
+            for chat_id, text in ((1, "a1"), (1, "a2"), (2, "b1"))
+        ))
+        return start, sent
+
+    start, sent = asyncio.run(scenario())
+    # Второе сообщение в чат 1 ждёт маркер чата, чат 2 - нет
+    assert sent["b1"] - start < 0.5
+    assert sent["a2"] - start >= 0.9
@@ -0,0 +1,178 @@
+import asyncio
+import pytest
+from utils.shared import MemoryKV, SharedChatLock, SharedLock
+from utils.singleflight import SharedSingleFlight, SingleFlight
+
+
+def test_concurrent_calls_are_coalesced():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch(value):
+            calls.append(value)
+            await asyncio.sleep(0.05)
+            return {"value": value}
+
+        results = await asyncio.gather(*(flight.do("key", fetch, 1) for _ in range(10)))
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(scenario())
+    assert calls == [1]
+    assert all(result == {"value": 1} for result in results)
+    assert flight.stats["misses"] == 1
+    assert flight.stats["coalesced"] == 9
+    assert not flight.in_flight("key")
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key
+
+        return await asyncio.gather(flight.do("a", fetch, "a"), flight.do("b", fetch, "b")), calls
+
+    results, calls = asyncio.run(scenario())
+    assert results == ["a", "b"]
+    assert sorted(calls) == ["a", "b"]
+
+
+def test_exception_reaches_every_waiter_and_is_not_cached():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def failing():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError("site down")
+
+        results = await asyncio.gather(*(flight.do("key", failing) for _ in range(3)), return_exceptions=True)
+
+        async def ok():
+            calls.append(2)
+            return "ok"
+
+        # После ошибки ключ свободен: следующий вызов выполняется заново
+        retry = await flight.do("key", ok)
+        return results, retry, calls
+
+    results, retry, calls = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert retry == "ok"
+    assert calls == [1, 2]
+
+
+def test_cancelled_waiter_does_not_cancel_the_call():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        owner = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return await owner
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_spawn_skips_running_key():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+
+        first = flight.spawn("key", fetch)
+        second = flight.spawn("key", fetch)
+        await first
+        return first, second, calls
+
+    first, second, calls = asyncio.run(scenario())
+    assert first is not None
+    assert second is None
+    assert calls == [1]
+
+
+def test_shared_flight_coalesces_across_instances():
+    async def scenario():
+        kv = MemoryKV()
+        # Два экземпляра с общим хранилищем - как два процесса с одним Redis
+        first, second = (SharedSingleFlight(client=kv, lock_ttl=5, poll_interval=0.01) for _ in range(2))
+        calls = []
+
+        async def fetch(value):
+            calls.append(value)
+            await asyncio.sleep(0.05)
+            return [value]
+
+        results = await asyncio.gather(first.do("key", fetch, 1), second.do("key", fetch, 2))
+        locks = [key async for key in kv.scan_iter("flight:lock:*")]
+        return results, calls, locks
+
+    results, calls, locks = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert results[0] == results[1] == [calls[0]]
+    assert locks == []
+
+
+def test_shared_flight_propagates_exception_and_releases_lock():
+    async def scenario():
+        kv = MemoryKV()
+        flight = SharedSingleFlight(client=kv, lock_ttl=5, poll_interval=0.01)
+
+        async def failing():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await flight.do("key", failing)
+        return [key async for key in kv.scan_iter("flight:lock:*")]
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_shared_lock_release_keeps_lock_of_new_owner():
+    async def scenario():
+        kv = MemoryKV()
+        first = SharedLock(kv, "lock", ttl=0.05, poll_interval=0.01)
+        second = SharedLock(kv, "lock", ttl=5, poll_interval=0.01)
+        await first.acquire()
+        await asyncio.sleep(0.06)       # TTL первого истёк, блокировку берёт второй
+        await second.acquire()
+        await first.release()
+        return await kv.get("lock"), second.token
+
+    owner, token = asyncio.run(scenario())
+    assert owner == token
+
+
+def test_chat_lock_serializes_holders():
+    async def scenario():
+        chat_lock = SharedChatLock(client=MemoryKV(), poll_interval=0.01)
+        events = []
+
+        async def handle(name):
+            async with chat_lock.hold(42):
+                events.append(f"{name}+")
+                await asyncio.sleep(0.02)
+                events.append(f"{name}-")
+
+        await asyncio.gather(handle("a"), handle("b"))
+        return events
+
+    events = asyncio.run(scenario())
+    assert events in (["a+", "a-", "b+", "b-"], ["b+", "b-", "a+", "a-"])
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import pytest
+from user import SQLiteUserRepository, UserRepository
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_repository_interface_is_abstract():
+    with pytest.raises(TypeError):
+        UserRepository()
+
+
+def test_legacy_users_file_is_migrated_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "users.json").write_text(json.dumps({"1": {"name": "Анна", "phone": "+998", "language": "uz"}}))
+    path = str(tmp_path / "users.db")
+
+    async def load():
+        repo = SQLiteUserRepository(path=path)
+        await repo.start()
+        user = await repo.get_user("1")
+        await repo.close()
+        return user
+
+    assert run(load()) == {"name": "Анна", "phone": "+998", "language": "uz"}
+    assert not (tmp_path / "users.json").exists()
+    assert (tmp_path / "users.json.migrated").exists()
+    assert run(load()) == {"name": "Анна", "phone": "+998", "language": "uz"}
+
+
+def test_updates_are_flushed_once_after_delay(tmp_path, monkeypatch):
+    path = str(tmp_path / "users.db")
+
+    async def scenario():
+        repo = SQLiteUserRepository(path=path, flush_interval=0.05, flush_batch=100)
+        other = SQLiteUserRepository(path=path, cache_ttl=0)
+        batches = []
+        flush_rows = repo._flush_rows
+        monkeypatch.setattr(repo, "_flush_rows", lambda items: batches.append(items) or flush_rows(items))
+
+        await repo.add_user("1", "Анна", "+998")
+        await repo.set_language("1", "uz")
+        await repo.add_user("2", "Бобур", "+999")
+        before = await other.get_user("1")
+        await asyncio.sleep(0.2)
+        after = await other.get_user("1"), await other.get_user("2")
+        await repo.close()
+        await other.close()
+        return before, after, batches
+
+    before, after, batches = run(scenario())
+    assert before is None
+    assert after == ({"name": "Анна", "phone": "+998", "language": "uz"}, {"name": "Бобур", "phone": "+999"})
+    assert len(batches) == 1
+
+
+def test_concurrent_updates_from_two_instances_are_merged(tmp_path):
+    path = str(tmp_path / "users.db")
+
+    async def scenario():
+        # Два процесса с общей базой: у каждого своё устаревшее представление о записи
+        first = SQLiteUserRepository(path=path, flush_interval=60)
+        second = SQLiteUserRepository(path=path, flush_interval=60)
+        await first.add_user("1", "Анна", "+998")
+        await first.flush()
+        await first.get_user("1")
+        await second.get_user("1")
+
+        await first.set_language("1", "uz")
+        await second.update_user("1", notify_hour=9)
+        await asyncio.gather(first.flush(), second.flush())
+        await first.close()
+        await second.close()
+
+        reopened = SQLiteUserRepository(path=path)
+        user = await reopened.get_user("1")
+        await reopened.close()
+        return user
+
+    assert run(scenario()) == {"name": "Анна", "phone": "+998", "language": "uz", "notify_hour": 9}
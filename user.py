@@ -0,0 +1,297 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from settings import (
+    USER_BACKEND, USERS_DB_PATH, USERS_CACHE_SIZE, USERS_CACHE_TTL, USERS_FLUSH_INTERVAL, USERS_FLUSH_BATCH,
+)
+from utils.sqlite import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# Старый файл пользователей, переносится в базу при первом запуске
+LEGACY_USERS_FILE = "users.json"
+
+
+class UserRepository(ABC):
+    """Асинхронное хранилище пользователей. Запись - словарь {"name", "phone", ...}."""
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @abstractmethod
+    async def get_user(self, user_id):
+        """Запись пользователя или None."""
+
+    async def add_user(self, user_id, name, phone):
+        await self.update_user(user_id, name=name, phone=phone)
+
+    @abstractmethod
+    async def update_user(self, user_id, **fields):
+        """Создаёт пользователя или дополняет его запись полями fields."""
+
+    @abstractmethod
+    async def subscribers(self, lang):
+        """id пользователей, подписанных на новые статьи языка lang."""
+
+    async def set_subscription(self, user_id, lang, enabled):
+        """Включает или выключает подписку; подписки хранятся в записи: {"subscriptions": [...]}."""
+        user = await self.get_user(user_id) or {}
+        subscriptions = set(user.get("subscriptions", []))
+        if enabled:
+            subscriptions.add(lang)
+        else:
+            subscriptions.discard(lang)
+        await self.update_user(user_id, subscriptions=sorted(subscriptions))
+        return subscriptions
+
+    async def set_language(self, user_id, lang):
+        """Язык статей пользователя; хранится в записи: {"language": "uz"}."""
+        await self.update_user(user_id, language=lang)
+
+
+class MemoryUserRepository(UserRepository):
+    """Пользователи только в памяти (для локального запуска и проверок)."""
+
+    def __init__(self):
+        self.users = {}
+
+    async def get_user(self, user_id):
+        return self.users.get(user_id)
+
+    async def update_user(self, user_id, **fields):
+        self.users[user_id] = {**self.users.get(user_id, {}), **fields}
+        return self.users[user_id]
+
+    async def subscribers(self, lang):
+        return [user_id for user_id, user in self.users.items() if lang in user.get("subscriptions", ())]
+
+
+class SQLiteUserRepository(UserRepository, SQLiteStore):
+    """Пользователи в SQLite: кэш чтения в памяти, пакетная отложенная запись.
+
+    В базу пишутся только изменённые поля (слияние с текущей строкой), поэтому
+    несколько процессов не затирают изменения друг друга.
+    """
+
+    def __init__(self, path=USERS_DB_PATH, cache_size=USERS_CACHE_SIZE, cache_ttl=USERS_CACHE_TTL,
+                 flush_interval=USERS_FLUSH_INTERVAL, flush_batch=USERS_FLUSH_BATCH):
+        super().__init__(path, "users-db")
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        # user_id -> (запись, срок годности); отсутствие пользователя не кэшируется, чтобы
+        # регистрация в другом процессе (webhook-режим) была видна сразу после записи в базу
+        self._cache = OrderedDict()
+        self._pending = {}           # user_id -> изменённые поля, ожидающие записи в базу
+        self._flush_task = None
+
+    # --- синхронная часть, выполняется в потоке базы ---
+
+    def _create(self, conn):
+        # user_id - первичный ключ, по нему строится индекс
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            "user_id TEXT PRIMARY KEY, name TEXT, phone TEXT, "
+            "data TEXT NOT NULL DEFAULT '{}', updated_at TEXT)"
+        )
+
+    def _migrate_legacy(self):
+        """Однократно переносит users.json в базу."""
+        conn = self._connect()
+        if not os.path.exists(LEGACY_USERS_FILE):
+            return 0
+        if conn.execute("SELECT 1 FROM users LIMIT 1").fetchone():
+            return 0
+        try:
+            with open(LEGACY_USERS_FILE, "r") as f:
+                legacy = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.error("Не удалось прочитать файл пользователей", extra={"path": LEGACY_USERS_FILE, "error": str(e)})
+            return 0
+        self._write_rows(conn, [(str(user_id), record) for user_id, record in legacy.items()])
+        os.replace(LEGACY_USERS_FILE, LEGACY_USERS_FILE + ".migrated")
+        return len(legacy)
+
+    @staticmethod
+    def _write_rows(conn, items):
+        now = datetime.now().isoformat()
+        rows = []
+        for user_id, record in items:
+            extra = {k: v for k, v in record.items() if k not in ("name", "phone")}
+            rows.append((user_id, record.get("name"), record.get("phone"),
+                         json.dumps(extra, ensure_ascii=False), now))
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO users (user_id, name, phone, data, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)", rows
+            )
+
+    @staticmethod
+    def _merge_rows(conn, items):
+        """Дописывает изменённые поля: data сливается с сохранённой (json_patch), а не заменяется."""
+        now = datetime.now().isoformat()
+        rows = []
+        for user_id, fields in items:
+            extra = {k: v for k, v in fields.items() if k not in ("name", "phone")}
+            rows.append((user_id, fields.get("name"), fields.get("phone"),
+                         json.dumps(extra, ensure_ascii=False), now))
+        with conn:
+            conn.executemany(
+                "INSERT INTO users (user_id, name, phone, data, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (user_id) DO UPDATE SET "
+                "name = COALESCE(excluded.name, users.name), "
+                "phone = COALESCE(excluded.phone, users.phone), "
+                "data = json_patch(users.data, excluded.data), "
+                "updated_at = excluded.updated_at", rows
+            )
+
+    def _select(self, user_id):
+        row = self._connect().execute(
+            "SELECT name, phone, data FROM users WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        name, phone, data = row
+        return {"name": name, "phone": phone, **json.loads(data)}
+
+    def _select_subscribers(self, lang):
+        rows = self._connect().execute(
+            "SELECT user_id FROM users WHERE EXISTS "
+            "(SELECT 1 FROM json_each(users.data, '$.subscriptions') WHERE value = ?)", (lang,)
+        ).fetchall()
+        return [user_id for user_id, in rows]
+
+    def _flush_rows(self, items):
+        self._merge_rows(self._connect(), items)
+
+    def _update_subscriptions(self, user_id, lang, enabled):
+        """Чтение и запись подписок одной транзакцией: BEGIN IMMEDIATE блокирует запись другим процессам."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT data FROM users WHERE user_id = ?", (user_id,)).fetchone()
+            subscriptions = set(json.loads(row[0]).get("subscriptions", [])) if row else set()
+            if enabled:
+                subscriptions.add(lang)
+            else:
+                subscriptions.discard(lang)
+            conn.execute(
+                "UPDATE users SET data = json_set(data, '$.subscriptions', json(?)), updated_at = ? "
+                "WHERE user_id = ?",
+                (json.dumps(sorted(subscriptions)), datetime.now().isoformat(), user_id)
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return subscriptions
+
+    # --- асинхронный интерфейс ---
+
+    async def start(self):
+        migrated = await self._run(self._migrate_legacy)
+        if migrated:
+            logger.info("Пользователи перенесены в базу", extra={"path": LEGACY_USERS_FILE, "count": migrated})
+
+    def _remember(self, user_id, record):
+        if self.cache_ttl <= 0:
+            return
+        self._cache[user_id] = (record, time.monotonic() + self.cache_ttl)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _cached(self, user_id):
+        item = self._cache.get(user_id)
+        if item is None:
+            return None
+        record, expires_at = item
+        if expires_at <= time.monotonic():
+            del self._cache[user_id]
+            return None
+        self._cache.move_to_end(user_id)
+        return record
+
+    async def get_user(self, user_id):
+        record = self._cached(user_id)
+        if record is not None:
+            return record
+        record = await self._run(self._select, user_id)
+        # Ещё не записанные изменения (в том числе регистрация) поверх строки из базы;
+        # если они успели записаться во время запроса, повторное слияние ничего не меняет
+        pending = self._pending.get(user_id)
+        if pending:
+            record = {**(record or {}), **pending}
+        if record is not None:
+            self._remember(user_id, record)
+        return record
+
+    async def update_user(self, user_id, **fields):
+        current = await self.get_user(user_id) or {}
+        record = {**current, **fields}
+        self._pending[user_id] = {**self._pending.get(user_id, {}), **fields}
+        self._remember(user_id, record)
+        if len(self._pending) >= self.flush_batch:
+            await self.flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+        return record
+
+    async def set_subscription(self, user_id, lang, enabled):
+        # Подписки меняются в базе, а не поверх кэша: кэш мог устареть, если подписку
+        # только что переключил другой процесс
+        await self.flush()
+        subscriptions = await self._run(self._update_subscriptions, user_id, lang, enabled)
+        record = self._cached(user_id)
+        if record is not None:
+            self._remember(user_id, {**record, "subscriptions": sorted(subscriptions)})
+        return subscriptions
+
+    async def subscribers(self, lang):
+        # Сначала записываем отложенные изменения, чтобы новые подписки попали в выборку
+        await self.flush()
+        return await self._run(self._select_subscribers, lang)
+
+    async def _delayed_flush(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self):
+        """Записывает накопленные изменения одной транзакцией."""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        try:
+            await self._run(self._flush_rows, list(batch.items()))
+        except sqlite3.Error as e:
+            logger.error("Ошибка при сохранении пользователей", extra={"error": str(e)})
+            # Возвращаем несохранённое, не затирая более свежие изменения
+            for user_id, fields in batch.items():
+                self._pending[user_id] = {**fields, **self._pending.get(user_id, {})}
+
+    async def close(self):
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+        await self._run(self._close)
+
+
+USER_BACKENDS = {
+    "sqlite": SQLiteUserRepository,
+    "memory": MemoryUserRepository,
+}
+
+
+def create_user_repository(backend=USER_BACKEND):
+    """Создаёт хранилище пользователей по имени бэкенда из настроек."""
+    return USER_BACKENDS[backend]()
@@ -0,0 +1,186 @@
+import logging
+import time
+from settings import ARCHIVE_DB_PATH
+from utils.formatters import article_id
+from utils.sqlite import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+
+def _article(row):
+    url, title, date = row
+    return {"title": title, "content": "", "date": date, "emoji": "📰", "url": url}
+
+
+class ArchiveStore(SQLiteStore):
+    """Локальная копия архива Kadrovik.uz в SQLite: статьи, их тексты и состояние обхода.
+
+    В отличие от кэша записи не устаревают и не вытесняются.
+    """
+
+    def __init__(self, path=ARCHIVE_DB_PATH):
+        super().__init__(path, "archive-db")
+        self._known = None  # lang -> множество URL, загружается в start()
+
+    # --- синхронная часть, выполняется в потоке базы ---
+
+    def _create(self, conn):
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "url TEXT PRIMARY KEY, id TEXT NOT NULL, lang TEXT NOT NULL, "
+            "title TEXT, date TEXT, content TEXT, added_at REAL NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, failed_at REAL)"
+        )
+        # Архивы, созданные до учёта неудачных загрузок
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(articles)")}
+        if "attempts" not in columns:
+            conn.execute("ALTER TABLE articles ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+            conn.execute("ALTER TABLE articles ADD COLUMN failed_at REAL")
+        conn.execute("CREATE INDEX IF NOT EXISTS articles_id ON articles (id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS articles_lang_date ON articles (lang, date)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS crawl_state ("
+            "lang TEXT PRIMARY KEY, next_url TEXT, complete INTEGER NOT NULL DEFAULT 0)"
+        )
+
+    def _load_known(self):
+        known = {}
+        for url, lang in self._connect().execute("SELECT url, lang FROM articles"):
+            known.setdefault(lang, set()).add(url)
+        return known
+
+    def _insert(self, lang, articles):
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO articles (url, id, lang, title, date, added_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(a["url"], article_id(a["url"]), lang, a["title"], a["date"], now) for a in articles]
+            )
+
+    def _update_content(self, url, content):
+        with self._connect() as conn:
+            conn.execute("UPDATE articles SET content = ? WHERE url = ?", (content, url))
+
+    def _update_failure(self, url):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE articles SET attempts = attempts + 1, failed_at = ? WHERE url = ?", (time.time(), url)
+            )
+
+    def _select_content(self, url):
+        row = self._connect().execute("SELECT content FROM articles WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def _select_by_id(self, ref_id):
+        row = self._connect().execute(
+            "SELECT url, title, date FROM articles WHERE id = ?", (ref_id,)
+        ).fetchone()
+        return _article(row) if row else None
+
+    def _select_latest(self, lang, limit):
+        rows = self._connect().execute(
+            "SELECT url, title, date FROM articles WHERE lang = ? ORDER BY date DESC, added_at DESC LIMIT ?",
+            (lang, limit)
+        ).fetchall()
+        return [_article(row) for row in rows]
+
+    def _select_missing(self, lang, limit, max_attempts):
+        rows = self._connect().execute(
+            "SELECT url FROM articles WHERE lang = ? AND content IS NULL AND attempts < ? "
+            "ORDER BY date DESC LIMIT ?",
+            (lang, max_attempts, limit)
+        ).fetchall()
+        return [url for url, in rows]
+
+    def _select_page(self, after, limit):
+        rows = self._connect().execute(
+            "SELECT rowid, url, lang, title, date, content FROM articles "
+            "WHERE rowid > ? ORDER BY rowid LIMIT ?",
+            (after, limit)
+        ).fetchall()
+        return [
+            (rowid, {**_article((url, title, date)), "lang": lang, "content": content or ""})
+            for rowid, url, lang, title, date, content in rows
+        ]
+
+    def _select_state(self, lang):
+        row = self._connect().execute(
+            "SELECT next_url, complete FROM crawl_state WHERE lang = ?", (lang,)
+        ).fetchone()
+        return {"next_url": row[0], "complete": bool(row[1])} if row else None
+
+    def _write_state(self, lang, next_url, complete):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO crawl_state (lang, next_url, complete) VALUES (?, ?, ?)",
+                (lang, next_url, int(complete))
+            )
+
+    # --- асинхронный интерфейс ---
+
+    async def start(self):
+        """Загружает множество уже известных URL (нужно обходчику)."""
+        if self._known is None:
+            self._known = await self._run(self._load_known)
+            logger.info("Архив загружен", extra={
+                f"articles_{lang}": len(urls) for lang, urls in self._known.items()
+            })
+
+    def known(self, lang):
+        return self._known.setdefault(lang, set())
+
+    async def add_articles(self, lang, articles):
+        """Сохраняет новые статьи ленты (без текста)."""
+        if not articles:
+            return
+        await self._run(self._insert, lang, articles)
+        if self._known is not None:
+            self.known(lang).update(article["url"] for article in articles)
+
+    async def set_content(self, url, content):
+        await self._run(self._update_content, url, content)
+
+    async def record_failure(self, url):
+        """Неудачная загрузка текста: после max_attempts попыток статья больше не запрашивается."""
+        await self._run(self._update_failure, url)
+
+    async def get_content(self, url):
+        return await self._run(self._select_content, url)
+
+    async def get_by_id(self, ref_id):
+        """Статья по id из callback_data (см. formatters.article_id)."""
+        return await self._run(self._select_by_id, ref_id)
+
+    async def latest(self, lang, limit):
+        return await self._run(self._select_latest, lang, limit)
+
+    async def missing_content(self, lang, limit, max_attempts):
+        """URL статей, текст которых ещё не загружен (меньше max_attempts неудачных попыток)."""
+        return await self._run(self._select_missing, lang, limit, max_attempts)
+
+    async def items(self, batch_size=500):
+        """Все статьи архива с текстами (для построения поискового индекса).
+
+        Читаются порциями по batch_size: тексты всего архива не загружаются в память разом.
+        """
+        after = 0
+        while True:
+            page = await self._run(self._select_page, after, batch_size)
+            for _, article in page:
+                yield article
+            if len(page) < batch_size:
+                return
+            after = page[-1][0]
+
+    async def get_state(self, lang):
+        return await self._run(self._select_state, lang)
+
+    async def set_state(self, lang, next_url, complete=False):
+        await self._run(self._write_state, lang, next_url, complete)
+
+    async def close(self):
+        await self._run(self._close)
+        self._known = None
+
+
+archive = ArchiveStore()
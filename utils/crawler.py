@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import re
+from settings import (
+    SUPPORTED_LANGUAGES, CRAWL_INTERVAL, CRAWL_CONCURRENCY, CRAWL_DELAY, CRAWL_MAX_PAGES, CRAWL_MAX_ATTEMPTS,
+)
+from utils.archive import archive
+from utils.extract import extract_listing, run_in_parser_pool
+from utils.http import fetch_text
+from utils.parser import site_url, download_article_content
+from utils.search_index import search_index
+
+# Инкрементальный обход архива Kadrovik.uz по страницам ленты.
+# Первый проход идёт от начала ленты вглубь (не больше CRAWL_MAX_PAGES страниц за раз,
+# место остановки сохраняется). Следующие проходы сначала забирают новые статьи
+# сверху ленты до первой уже известной, затем продолжают докачку архива.
+#
+# Следующая страница берётся из ссылки a.pagination__next. Если её нет, адрес угадывается
+# по PAGE_PATTERNS; вид адреса, который сайт не понял (пустая страница, ошибка или та же
+# страница, что и предыдущая), заменяется следующим.
+
+logger = logging.getLogger(__name__)
+
+PAGE_PATTERNS = (
+    ("{base}page/{page}/", re.compile(r"/page/(\d+)/?$")),
+    ("{base}?page={page}", re.compile(r"[?&]page=(\d+)")),
+)
+
+_task = None
+
+
+def page_position(url):
+    """(номер страницы, индекс вида адреса в PAGE_PATTERNS); для первой страницы - (1, None)."""
+    for index, (_, regex) in enumerate(PAGE_PATTERNS):
+        match = regex.search(url)
+        if match:
+            return int(match.group(1)), index
+    return 1, None
+
+
+def page_url(lang, page, pattern=0):
+    return PAGE_PATTERNS[pattern][0].format(base=site_url(lang), page=page)
+
+
+class Crawler:
+    def __init__(self, store=archive, concurrency=CRAWL_CONCURRENCY, delay=CRAWL_DELAY, max_pages=CRAWL_MAX_PAGES):
+        self.store = store
+        self.delay = delay
+        self.max_pages = max_pages
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _polite_fetch(self, url):
+        """Запрос к сайту с ограничением параллельности и паузой после него."""
+        async with self._semaphore:
+            try:
+                return await fetch_text(url, timeout=10)
+            finally:
+                await asyncio.sleep(self.delay)
+
+    async def _fetch_listing(self, url, lang):
+        html = await self._polite_fetch(url)
+        return await run_in_parser_pool(extract_listing, html, url, site_url(lang))
+
+    async def _fetch_guessed(self, url, lang):
+        """Страница по угаданному адресу: ошибка (например, 404) - то же, что пустая страница."""
+        try:
+            return await self._fetch_listing(url, lang)
+        except Exception as e:
+            logger.info("Адрес страницы не подошёл", extra={"url": url, "error": str(e)})
+            return [], None
+
+    def _next_url(self, lang, url, next_url):
+        """Ссылка на следующую страницу или угаданный адрес (второе значение - угадан ли он)."""
+        if next_url:
+            return next_url, False
+        page, pattern = page_position(url)
+        return page_url(lang, page + 1, pattern or 0), True
+
+    async def _fetch_body(self, url):
+        async with self._semaphore:
+            try:
+                content = await download_article_content(url)
+            except Exception as e:
+                logger.warning("Не удалось загрузить статью", extra={"url": url, "error": str(e)})
+                await self.store.record_failure(url)
+                return False
+            finally:
+                await asyncio.sleep(self.delay)
+        if len(content) <= 50:
+            # Текст не извлекается - после CRAWL_MAX_ATTEMPTS попыток статья пропускается
+            await self.store.record_failure(url)
+            return False
+        await self.store.set_content(url, content)
+        search_index.add_body(url, content)
+        return True
+
+    async def _store_page(self, lang, articles):
+        """Сохраняет новые статьи страницы и сразу загружает их тексты."""
+        known = self.store.known(lang)
+        new = [article for article in articles if article["url"] not in known]
+        if new:
+            await self.store.add_articles(lang, new)
+            search_index.add_articles(new, lang)
+            await asyncio.gather(*(self._fetch_body(article["url"]) for article in new))
+        return new
+
+    async def _delta(self, lang):
+        """Новые статьи сверху ленты - до первой уже известной."""
+        url, pages, added, guessed = site_url(lang), 0, 0, False
+        while url and pages < self.max_pages:
+            if guessed:
+                articles, next_url = await self._fetch_guessed(url, lang)
+            else:
+                articles, next_url = await self._fetch_listing(url, lang)
+            pages += 1
+            new = await self._store_page(lang, articles)
+            added += len(new)
+            if len(new) < len(articles) or not articles:
+                break
+            url, guessed = self._next_url(lang, url, next_url)
+        return pages, added
+
+    async def _backfill(self, lang, url, budget):
+        """Докачка архива вглубь с сохранённого места."""
+        pages, added, previous, confirmed = 0, 0, None, False
+        guessed = page_position(url)[1] is not None
+        while url and pages < budget:
+            if guessed:
+                articles, next_url = await self._fetch_guessed(url, lang)
+            else:
+                articles, next_url = await self._fetch_listing(url, lang)
+            pages += 1
+            urls = [article["url"] for article in articles]
+            if not articles or urls == previous:
+                page, pattern = page_position(url)
+                if guessed and not confirmed and pattern is not None and pattern + 1 < len(PAGE_PATTERNS):
+                    # Сайт не понял адрес страницы - пробуем следующий вид
+                    url = page_url(lang, page, pattern + 1)
+                    continue
+                # Пустая страница или та же, что и предыдущая (сайт отдаёт последнюю) - конец архива
+                url = None
+            else:
+                added += len(await self._store_page(lang, articles))
+                previous = urls
+                # Угаданный вид адреса сработал - дальше его не меняем
+                confirmed = confirmed or guessed
+                url, guessed = self._next_url(lang, url, next_url)
+            await self.store.set_state(lang, url, complete=url is None)
+        return pages, added
+
+    async def _retry_missing(self, lang):
+        """Тексты, которые не удалось загрузить в прошлые проходы."""
+        missing = await self.store.missing_content(lang, self.max_pages * 10, CRAWL_MAX_ATTEMPTS)
+        results = await asyncio.gather(*(self._fetch_body(url) for url in missing))
+        return sum(results)
+
+    async def crawl(self, lang):
+        """Один проход по ленте языка lang; возвращает число новых статей."""
+        await self.store.start()
+        state = await self.store.get_state(lang)
+        pages, added = 0, 0
+        if state is None:
+            # Первый запуск: докачка начинается с первой страницы
+            state = {"next_url": site_url(lang), "complete": False}
+        else:
+            pages, added = await self._delta(lang)
+        if not state["complete"] and state["next_url"]:
+            more_pages, more = await self._backfill(lang, state["next_url"], self.max_pages - pages)
+            pages += more_pages
+            added += more
+        fetched = await self._retry_missing(lang)
+        logger.info("Обход архива завершён", extra={
+            "lang": lang, "pages": pages, "count": added, "bodies": fetched
+        })
+        return added
+
+
+async def crawl_loop(interval=CRAWL_INTERVAL):
+    """Периодически обходит архив для всех языков."""
+    crawler = Crawler()
+    while True:
+        for lang in SUPPORTED_LANGUAGES:
+            try:
+                await crawler.crawl(lang)
+            except Exception as e:
+                logger.error("Ошибка обхода архива", extra={"lang": lang, "error": str(e)})
+        await asyncio.sleep(interval)
+
+
+def start_crawler(interval=CRAWL_INTERVAL):
+    """Запускает обход архива (вызывается при старте бота; interval=0 - выключен)."""
+    global _task
+    if interval and (_task is None or _task.done()):
+        _task = asyncio.create_task(crawl_loop(interval))
+    return _task
+
+
+async def stop_crawler():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -0,0 +1,58 @@
+import hashlib
+import logging
+from functools import partial
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import BufferedInputFile
+from utils.storage import load_cache, save_cache
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(content):
+    """Хэш текста статьи: по нему кэшируется загруженный в Telegram файл."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+async def cached_file_id(content):
+    """file_id уже загруженного в Telegram файла с этим текстом или None."""
+    entry = await load_cache(f"file_{content_hash(content)}")
+    return entry["data"] if entry else None
+
+
+async def _send_cached(send, content, filename, caption, parse_mode):
+    cache_key = f"file_{content_hash(content)}"
+    entry = await load_cache(cache_key)
+    if entry:
+        try:
+            return await send(
+                document=entry["data"],
+                caption=caption,
+                parse_mode=parse_mode
+            )
+        except TelegramBadRequest as e:
+            logger.warning("file_id устарел, загружаем файл заново", extra={"error": str(e)})
+
+    document = BufferedInputFile(content.encode("utf-8"), filename=filename)
+    sent = await send(
+        document=document,
+        caption=caption,
+        parse_mode=parse_mode
+    )
+    if sent.document:
+        # ttl=0 - без срока действия, запись вытесняется только по LRU
+        await save_cache(cache_key, sent.document.file_id, ttl=0)
+    return sent
+
+
+async def send_article_document(message, content, filename, caption, parse_mode="Markdown"):
+    """Отправляет статью файлом.
+
+    Первый раз файл собирается в памяти и загружается в Telegram, его file_id
+    сохраняется в кэше. Повторные отправки того же текста идут по file_id.
+    """
+    return await _send_cached(message.answer_document, content, filename, caption, parse_mode)
+
+
+async def send_document_to(bot, chat_id, content, filename, caption, parse_mode="Markdown"):
+    """То же, что send_article_document, но в произвольный чат (для рассылок)."""
+    return await _send_cached(partial(bot.send_document, chat_id), content, filename, caption, parse_mode)
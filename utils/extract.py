@@ -0,0 +1,350 @@
+import asyncio
+import importlib.util
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urljoin
+from settings import PARSE_ENGINE, PARSE_EXECUTOR, PARSE_WORKERS
+from utils.metrics import PARSE_LATENCY
+
+# Извлечение данных из HTML Kadrovik.uz. Функции чистые (без сети и кэша),
+# поэтому их можно выполнять в пуле потоков или процессов.
+
+# bs4 и lxml импортируются при первом разборе: бот стартует быстрее,
+# а при свежем кэше они могут вообще не понадобиться
+HAS_LXML = importlib.util.find_spec("lxml") is not None
+
+# Разбираем только нужные части страницы
+_strainers = {}
+
+
+def _strainer(kind):
+    if not _strainers:
+        from bs4 import SoupStrainer
+        _strainers.update({
+            "listing": SoupStrainer("section", class_="posts-block"),
+            "article": SoupStrainer(["h1", "time", "section"]),
+        })
+    return _strainers[kind]
+
+
+def _soup(html, engine, strainer=None):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, _features(engine), parse_only=_strainer(strainer) if strainer else None)
+
+
+def _features(engine):
+    # lxml закрывает незакрытые теги как браузер (<p>one<p>two - два соседних абзаца),
+    # html.parser и ArticleStreamParser вкладывают их друг в друга. На корректной
+    # разметке результаты совпадают, на битой текст статьи может отличаться
+    # (см. check_fixtures и fixtures/*malformed*)
+    engine = engine or PARSE_ENGINE
+    if engine == "lxml" and not HAS_LXML:
+        return "html.parser"
+    return engine
+
+
+def _collect_articles(soup, base_url, limit):
+    articles = []
+    posts_section = soup.select_one("section.posts-block ul.posts-list")
+    if posts_section:
+        for item in posts_section.select("li.post-card-wrapper")[:limit]:
+            article_link = item.select_one("a[href]")
+            if article_link:
+                title = item.select_one("h4.post-card__title")
+                date_elem = item.select_one("time.longread-post__time-published")
+                title_text = title.text.strip() if title else "Без заголовка"
+                date_text = date_elem["datetime"] if date_elem else datetime.now().isoformat()
+                link = article_link["href"]
+                if not link.startswith("http"):
+                    link = base_url.rstrip("/") + "/" + link.lstrip("/")
+
+                articles.append({
+                    "title": title_text,
+                    "content": "",
+                    "date": date_text,
+                    "emoji": "📰",
+                    "url": link
+                })
+    return articles
+
+
+def extract_articles(html, base_url, limit=10, engine=None, partial=True):
+    """Список статей со страницы ленты или поиска."""
+    soup = _soup(html, engine, "listing" if partial else None)
+    return _collect_articles(soup, base_url, limit)
+
+
+def extract_listing(html, page_url, base_url, engine=None, partial=True):
+    """Все статьи страницы ленты и адрес следующей страницы (None на последней)."""
+    soup = _soup(html, engine, "listing" if partial else None)
+    next_link = soup.select_one("section.posts-block a.pagination__next[href]")
+    next_url = urljoin(page_url, next_link["href"]) if next_link else None
+    return _collect_articles(soup, base_url, None), next_url
+
+
+def extract_article_content(html, engine=None, partial=True):
+    """Текст статьи с правильными переносами строк после emoji и абзацев."""
+    soup = _soup(html, engine, "article" if partial else None)
+    if partial and not soup.find('section', {'class': 'longread-block'}):
+        # Нет блока статьи - нужен <body> целиком, разбираем страницу полностью
+        soup = _soup(html, engine)
+
+    # 1. Заголовок и дата (без #)
+    title = soup.find('h1').get_text(strip=True) if soup.find('h1') else "Без заголовка"
+    date_elem = soup.find('time', {'class': 'longread-post__time-published'})
+    date = date_elem['datetime'] if date_elem else ""
+
+    # 2. Ищем контейнер с контентом
+    content_block = soup.find('section', {'class': 'longread-block'}) or soup.find('body')
+
+    if not content_block:
+        return f"📰 {title}\n📅 {date}\n\nНе удалось найти контент."
+
+    # 3. Собираем только <p> и <strong>
+    elements = content_block.find_all(['p', 'strong'])
+    result = [f"📰 {title}", f"📅 {date}"]
+
+    for element in elements:
+        text = element.get_text(' ', strip=True)
+        if text:
+            if element.name == 'strong':
+                result.append(f"\n🔹 {text}\n")  # Новый абзац для 🔹
+            else:
+                result.append(f"\n{text}")       # Новый абзац для обычного текста
+
+    # 4. Объединяем и удаляем дубликаты
+    return ''.join(dict.fromkeys(result))
+
+
+class ArticleStreamParser(HTMLParser):
+    """Потоковый разбор статьи: текст приходит порциями, абзацы отдаются по мере готовности.
+
+    Результат совпадает с extract_article_content: заголовок и дата, затем <p> и <strong>
+    из блока longread-block без повторов. Заголовок (первый <h1>) и дата (первый
+    time.longread-post__time-published) могут стоять где угодно на странице, поэтому
+    абзацы придерживаются, пока оба не найдены; если их нет до конца страницы, шапка
+    с пустыми значениями отдаётся в finish(). Когда блок закрыт и шапка отдана,
+    done=True - остаток страницы можно не загружать. Если блока нет, до конца страницы
+    копится исходный HTML для полного разбора (fallback).
+    """
+
+    CAPTURE = ("p", "strong")
+    SKIP = ("script", "style", "template")
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = None
+        self.date = None
+        self.found_block = False
+        self.done = False
+        self.html = []          # исходный HTML, пока блок статьи не найден
+        self._h1 = None         # строки заголовка, пока открыт <h1>
+        self._depth = 0         # вложенность <section> внутри блока статьи
+        self._skip = 0
+        self._text = []         # текущий текстовый узел (может прийти в нескольких порциях)
+        self._open = []         # открытые <p>/<strong>: [тег, строки, готовый текст]
+        self._queue = []        # элементы в порядке открытия, ждущие закрытия
+        self._ready = []
+        self._held = []         # абзацы, ждущие заголовка и даты; None - шапка уже отдана
+        self._seen = set()
+
+    def push(self, text):
+        """Передаёт очередную порцию HTML; возвращает готовые абзацы."""
+        if self.html is not None:
+            self.html.append(text)
+        self.feed(text)
+        return self._take()
+
+    def finish(self):
+        """Конец страницы: закрывает незавершённые элементы и отдаёт остаток."""
+        self.close()
+        self._flush_text()
+        self._close_open(0)
+        if self.found_block:
+            self._release_header()
+        return self._take()
+
+    def _take(self):
+        ready, self._ready = self._ready, []
+        return ready
+
+    def _emit(self, piece):
+        if self._held is not None:
+            self._held.append(piece)
+        elif piece not in self._seen:
+            self._seen.add(piece)
+            self._ready.append(piece)
+
+    def _release_header(self):
+        # Шапка идёт первой, за ней придержанные абзацы
+        if self._held is None:
+            return
+        held, self._held = self._held, None
+        self._emit(f"📰 {self.title if self.title is not None else 'Без заголовка'}")
+        self._emit(f"📅 {self.date or ''}")
+        for piece in held:
+            self._emit(piece)
+
+    def _check_header(self):
+        if self.found_block and self.title is not None and self.date is not None:
+            self._release_header()
+            if not self._depth:
+                # Блок уже закрыт - ждали только заголовок или дату
+                self.done = True
+
+    def _flush_text(self):
+        if not self._text:
+            return
+        text, self._text = "".join(self._text), []
+        if self._h1 is not None:
+            self._h1.append(text)
+        for entry in self._open:
+            entry[1].append(text)
+
+    def _close_open(self, index):
+        # Закрываем элементы стека начиная с index (вложенные закрываются вместе с внешним)
+        for entry in self._open[index:]:
+            text = " ".join(part.strip() for part in entry[1] if part.strip())
+            if not text:
+                entry[2] = ""
+            elif entry[0] == "strong":
+                entry[2] = f"\n🔹 {text}\n"
+            else:
+                entry[2] = f"\n{text}"
+        del self._open[index:]
+        while self._queue and self._queue[0][2] is not None:
+            piece = self._queue.pop(0)[2]
+            if piece:
+                self._emit(piece)
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        if tag in self.SKIP:
+            self._skip += 1
+            return
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        if tag == "h1" and self.title is None:
+            self._h1 = []
+        elif tag == "time" and self.date is None and "longread-post__time-published" in classes:
+            self.date = attrs.get("datetime") or ""
+            self._check_header()
+        elif tag == "section":
+            if self._depth:
+                self._depth += 1
+            elif not self.found_block and "longread-block" in classes:
+                self.found_block = True
+                self._depth = 1
+                self.html = None
+                self._check_header()
+        if self._depth and tag in self.CAPTURE:
+            entry = [tag, [], None]
+            self._open.append(entry)
+            self._queue.append(entry)
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if tag in self.SKIP:
+            self._skip = max(0, self._skip - 1)
+            return
+        if tag == "h1" and self._h1 is not None:
+            self.title = "".join(part.strip() for part in self._h1 if part.strip())
+            self._h1 = None
+            self._check_header()
+        if self._depth and tag in self.CAPTURE:
+            for index in range(len(self._open) - 1, -1, -1):
+                if self._open[index][0] == tag:
+                    self._close_open(index)
+                    break
+        if tag == "section" and self._depth:
+            self._depth -= 1
+            if not self._depth:
+                self._close_open(0)
+                self.done = self._held is None
+
+    def handle_data(self, data):
+        if not self._skip:
+            self._text.append(data)
+
+    def handle_comment(self, data):
+        self._flush_text()
+
+
+def iter_article_paragraphs(chunks):
+    """Абзацы статьи из последовательности порций HTML; остаток после блока статьи не читается."""
+    parser = ArticleStreamParser()
+    for chunk in chunks:
+        yield from parser.push(chunk)
+        if parser.done:
+            return
+    yield from parser.finish()
+    if not parser.found_block:
+        yield extract_article_content("".join(parser.html))
+
+
+# --- Пул для разбора HTML вне event loop ---
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        if PARSE_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="html-parse")
+    return _executor
+
+
+async def run_in_parser_pool(func, *args):
+    """Выполняет функцию разбора в пуле, не блокируя обработку других апдейтов."""
+    loop = asyncio.get_running_loop()
+    with PARSE_LATENCY.time(func=func.__name__):
+        return await loop.run_in_executor(get_executor(), func, *args)
+
+
+def shutdown_parser_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def check_fixtures(fixtures_dir):
+    """Сравнивает быстрый и потоковый разбор с эталонным (html.parser, вся страница).
+
+    Страницы в fixtures/ написаны вручную по разметке Kadrovik.uz (posts-block, post-card,
+    longread-block), а не сохранены с сайта: если разметка сайта изменится, их нужно обновить.
+    На страницах с битой разметкой (*malformed* в имени) быстрый разбор сравнивается с полным
+    разбором тем же движком: lxml исправляет разметку иначе, чем html.parser (см. _features).
+    """
+    ok = True
+    for path in sorted(Path(fixtures_dir).glob("*.html")):
+        html = path.read_text(encoding="utf-8")
+        if path.name.startswith(("listing", "search")):
+            base_url = "https://kadrovik.uz/uz/" if "_uz" in path.name else "https://kadrovik.uz/"
+            reference = extract_articles(html, base_url, engine="html.parser", partial=False)
+            pairs = [(extract_articles(html, base_url), reference)]
+        else:
+            reference = extract_article_content(html, engine="html.parser", partial=False)
+            # Потоковый разбор мелкими порциями: границы порций режут теги и текст
+            chunks = (html[i:i + 97] for i in range(0, len(html), 97))
+            fast_reference = extract_article_content(html, partial=False) if "malformed" in path.name else reference
+            pairs = [
+                ("".join(iter_article_paragraphs(chunks)), reference),
+                (extract_article_content(html), fast_reference),
+            ]
+        same = all(result == expected for result, expected in pairs)
+        ok = ok and same
+        print(f"{'OK  ' if same else 'DIFF'} {path.name}")
+    return ok
+
+
+if __name__ == "__main__":
+    # python -m utils.extract [каталог с HTML-страницами]
+    directory = sys.argv[1] if len(sys.argv) > 1 else Path(__file__).resolve().parent.parent / "fixtures"
+    sys.exit(0 if check_fixtures(directory) else 1)
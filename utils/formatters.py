@@ -0,0 +1,97 @@
+import hashlib
+from collections import OrderedDict
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from settings import ARTICLES_PAGE_SIZE
+
+# Лимит длины текста сообщения Telegram
+MESSAGE_LIMIT = 4096
+
+# Готовые страницы списка: (lang, версия списка, страница) -> (части текста, клавиатура)
+_rendered = OrderedDict()
+_RENDERED_MAX = 64
+
+
+def article_id(url):
+    """Стабильный короткий идентификатор статьи для callback_data (лимит 64 байта)."""
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+
+
+def articles_version(articles):
+    """Версия списка: меняется, только если изменились сами статьи."""
+    digest = hashlib.sha1()
+    for article in articles:
+        digest.update(f"{article['url']}\0{article['title']}\0{article['date']}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def split_message(text, limit=MESSAGE_LIMIT):
+    """Делит текст на части не длиннее limit, по возможности по границам абзацев."""
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind("\n\n", 0, limit)
+        if cut <= 0:
+            cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+async def chunk_stream(pieces, limit=MESSAGE_LIMIT):
+    """Собирает части текста (async-итератор) в сообщения не длиннее limit.
+
+    Каждое сообщение отдаётся, как только набрано, не дожидаясь конца текста.
+    """
+    buffer = ""
+    async for piece in pieces:
+        buffer += piece
+        if len(buffer) > limit:
+            chunks = split_message(buffer, limit)
+            for chunk in chunks[:-1]:
+                yield chunk
+            buffer = chunks[-1]
+    for chunk in split_message(buffer, limit):
+        yield chunk
+
+
+def render_notification(article):
+    """Текст уведомления о новой статье (один на всех подписчиков)."""
+    return f"🔔 Новая статья на Kadrovik.uz\n\n📰 *{article['title']}*\n📅 {article['date']}"
+
+
+def render_latest_page(articles, lang, page=0, page_size=ARTICLES_PAGE_SIZE):
+    """Страница списка последних статей: части текста и клавиатура.
+
+    Результат собирается один раз для версии списка и переиспользуется для всех пользователей.
+    """
+    pages = max(1, -(-len(articles) // page_size))
+    page = min(max(page, 0), pages - 1)
+    key = (lang, articles_version(articles), page)
+    if key in _rendered:
+        _rendered.move_to_end(key)
+        return _rendered[key]
+
+    start = page * page_size
+    page_articles = articles[start:start + page_size]
+    lines = ["📰 Последние статьи с Kadrovik.uz:\n\n"]
+    buttons = []
+    for i, article in enumerate(page_articles, start + 1):
+        lines.append(f"{i}. {article['emoji']} *{article['title']}*\n📅 {article['date']}\n\n")
+        buttons.append([InlineKeyboardButton(text=f"{i} Статья", callback_data=f"article:{article_id(article['url'])}")])
+
+    navigation = []
+    if page > 0:
+        navigation.append(InlineKeyboardButton(text="◀️ Назад", callback_data=f"latest_page:{lang}:{page - 1}"))
+    if page < pages - 1:
+        navigation.append(InlineKeyboardButton(text="Далее ▶️", callback_data=f"latest_page:{lang}:{page + 1}"))
+    if navigation:
+        buttons.append(navigation)
+
+    rendered = (split_message("".join(lines)), InlineKeyboardMarkup(inline_keyboard=buttons))
+    _rendered[key] = rendered
+    while len(_rendered) > _RENDERED_MAX:
+        _rendered.popitem(last=False)
+    return rendered
@@ -0,0 +1,150 @@
+import asyncio
+import codecs
+import logging
+import aiohttp
+from settings import (
+    HTTP_USER_AGENT, HTTP_POOL_SIZE, HTTP_LIMIT_PER_HOST, HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT, HTTP_CONNECT_TIMEOUT, HTTP_TOTAL_TIMEOUT,
+    HTTP_RETRIES, HTTP_BACKOFF, HTTP_MAX_PAGE_BYTES, HTTP_STREAM_CHUNK,
+)
+from utils.metrics import HTTP_LATENCY
+
+logger = logging.getLogger(__name__)
+
+# Общая сессия aiohttp на всё время жизни бота
+_session = None
+
+# Статусы, при которых имеет смысл повторить запрос
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+async def start_http_client():
+    """Создаёт общую сессию с пулом keep-alive соединений."""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_SIZE,
+            limit_per_host=HTTP_LIMIT_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            headers={"User-Agent": HTTP_USER_AGENT},
+            timeout=aiohttp.ClientTimeout(total=HTTP_TOTAL_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        )
+    return _session
+
+
+async def close_http_client():
+    """Закрывает общую сессию при остановке бота."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def get_session():
+    """Возвращает общую сессию (создаёт её при первом обращении)."""
+    if _session is None or _session.closed:
+        return await start_http_client()
+    return _session
+
+
+async def _get(url, headers=None, timeout=None, retries=HTTP_RETRIES, backoff=HTTP_BACKOFF, params=None):
+    """GET через общую сессию с повторами и экспоненциальной задержкой.
+
+    Возвращает (status, text, response_headers); при 304 text равен None.
+    """
+    with HTTP_LATENCY.time():
+        return await _get_with_retries(url, headers, timeout, retries, backoff, params)
+
+
+async def _open_response(url, headers, timeout, retries, backoff, params=None):
+    """Открывает ответ с повторами: заголовки получены, тело ещё не прочитано."""
+    session = await get_session()
+    kwargs = {"timeout": aiohttp.ClientTimeout(total=timeout)} if timeout else {}
+    for attempt in range(retries + 1):
+        try:
+            # Параметры запроса кодирует aiohttp (yarl)
+            response = await session.get(url, headers=headers, params=params, **kwargs)
+            if response.status in RETRY_STATUSES and attempt < retries:
+                response.release()
+                raise aiohttp.ClientResponseError(
+                    response.request_info, response.history,
+                    status=response.status, message=response.reason or "",
+                )
+            if response.status != 304 and response.status >= 400:
+                response.release()
+                response.raise_for_status()
+            return response
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt >= retries or (
+                isinstance(e, aiohttp.ClientResponseError) and e.status not in RETRY_STATUSES
+            ):
+                raise
+            delay = backoff * (2 ** attempt)
+            logger.warning("Повтор запроса", extra={"url": url, "delay": delay, "error": str(e)})
+            await asyncio.sleep(delay)
+
+
+async def _get_with_retries(url, headers, timeout, retries, backoff, params=None):
+    response = await _open_response(url, headers, timeout, retries, backoff, params)
+    async with response:
+        if response.status == 304:
+            return response.status, None, response.headers
+        return response.status, await response.text(), response.headers
+
+
+async def fetch_text(url, timeout=None, retries=HTTP_RETRIES, backoff=HTTP_BACKOFF):
+    """Загружает страницу через общую сессию."""
+    _, text, _ = await _get(url, timeout=timeout, retries=retries, backoff=backoff)
+    return text
+
+
+async def fetch_conditional(url, etag=None, last_modified=None, timeout=None, params=None):
+    """Условный запрос (If-None-Match / If-Modified-Since).
+
+    Возвращает (text, etag, last_modified); text равен None, если страница не изменилась.
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    _, text, response_headers = await _get(url, headers=headers or None, timeout=timeout, params=params)
+    return (
+        text,
+        response_headers.get("ETag") or etag,
+        response_headers.get("Last-Modified") or last_modified,
+    )
+
+
+async def stream_text(url, max_bytes=HTTP_MAX_PAGE_BYTES, chunk_size=HTTP_STREAM_CHUNK, timeout=None,
+                      retries=HTTP_RETRIES, backoff=HTTP_BACKOFF):
+    """Загружает страницу частями (async-генератор строк), не больше max_bytes байт.
+
+    Если потребитель прекращает чтение раньше, соединение закрывается без загрузки остатка.
+    Время в HTTP_LATENCY - до конца чтения (или до остановки потребителем), а не до заголовков.
+    """
+    with HTTP_LATENCY.time():
+        response = await _open_response(url, None, timeout, retries, backoff)
+        try:
+            try:
+                decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(errors="replace")
+            except LookupError:
+                decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            received = 0
+            async for chunk in response.content.iter_chunked(chunk_size):
+                if received + len(chunk) > max_bytes:
+                    logger.warning("Страница больше лимита, чтение остановлено", extra={"url": url, "max_bytes": max_bytes})
+                    yield decoder.decode(chunk[:max_bytes - received], final=True)
+                    return
+                received += len(chunk)
+                yield decoder.decode(chunk)
+            yield decoder.decode(b"", final=True)
+        finally:
+            if response.content.at_eof():
+                response.release()
+            else:
+                response.close()
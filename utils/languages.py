@@ -0,0 +1,17 @@
+from settings import DEFAULT_LANGUAGE, SUPPORTED_LANGUAGES
+
+# Названия языков сайта для кнопок
+LANGUAGE_NAMES = {
+    "ru": "Русский",
+    "uz": "O'zbekcha",
+}
+
+
+def language_name(lang):
+    return LANGUAGE_NAMES.get(lang, lang)
+
+
+def user_language(user):
+    """Язык статей пользователя: выбранный в настройках или DEFAULT_LANGUAGE."""
+    lang = (user or {}).get("language")
+    return lang if lang in SUPPORTED_LANGUAGES else DEFAULT_LANGUAGE
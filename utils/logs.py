@@ -0,0 +1,84 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from settings import LOG_LEVEL, LOG_FORMAT
+
+# Логи пишутся через очередь: обработчик в event loop только кладёт запись
+# в очередь, а форматирование и вывод выполняет отдельный поток.
+
+# Стандартные поля LogRecord; всё остальное - поля из extra=...
+_STANDARD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+_config = None  # (level, fmt) последнего вызова setup_logging
+
+
+def _extra(record):
+    return {k: v for k, v in vars(record).items() if k not in _STANDARD_FIELDS}
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на запись, поля из extra добавляются как есть."""
+
+    def format(self, record):
+        payload = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **_extra(record),
+        }
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Обычная строка лога с полями extra в виде key=value."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = _extra(record)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+def setup_logging(level=LOG_LEVEL, fmt=LOG_FORMAT):
+    """Настраивает неблокирующее логирование (вызывается при старте процесса, повторно - ничего не делает).
+
+    Не вызывается при импорте: поток записи логов не переживает fork, см. _restart_after_fork.
+    """
+    global _listener, _config
+    if _listener is not None:
+        return
+    _config = (level, fmt)
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level)
+
+
+def _restart_after_fork():
+    """В дочернем процессе (webhook-процессы) потока записи нет: запускаем свой с новой очередью.
+
+    Иначе записи копятся в унаследованной очереди, которую никто не читает.
+    """
+    global _listener
+    if _listener is not None:
+        _listener = None
+        setup_logging(*_config)
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
@@ -0,0 +1,161 @@
+import bisect
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Метрики в текстовом формате Prometheus, без внешних зависимостей.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.values = defaultdict(float)
+
+    def inc(self, amount=1, **labels):
+        self.values[_labels_key(labels)] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.series = {}  # labels -> [счётчики по корзинам, сумма, количество]
+
+    def observe(self, value, **labels):
+        key = _labels_key(labels)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in self.series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class Gauge:
+    """Значение считается при каждом запросе /metrics функцией func.
+
+    Если задан label, func возвращает словарь {значение метки: число}.
+    """
+
+    def __init__(self, name, help_text, func, label=None):
+        self.name = name
+        self.help = help_text
+        self.func = func
+        self.label = label
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        value = self.func()
+        if self.label:
+            for label_value, number in value.items():
+                lines.append(f"{self.name}{_format_labels([(self.label, label_value)])} {number}")
+        else:
+            lines.append(f"{self.name} {value}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def _add(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text):
+        return self._add(Counter(name, help_text))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help_text, buckets))
+
+    def gauge(self, name, help_text, func, label=None):
+        return self._add(Gauge(name, help_text, func, label))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HANDLER_LATENCY = registry.histogram("kadrovik_handler_seconds", "Время обработки апдейта по типу")
+HTTP_LATENCY = registry.histogram("kadrovik_http_fetch_seconds", "Время загрузки страницы Kadrovik.uz")
+PARSE_LATENCY = registry.histogram("kadrovik_html_parse_seconds", "Время разбора HTML")
+CACHE_LATENCY = registry.histogram(
+    "kadrovik_cache_lookup_seconds", "Время чтения из кэша",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+)
+CACHE_REQUESTS = registry.counter("kadrovik_cache_requests_total", "Обращения к кэшу (hit/miss)")
+SEND_LATENCY = registry.histogram("kadrovik_telegram_request_seconds", "Время запроса к Telegram Bot API")
+SEND_QUEUE_WAIT = registry.histogram("kadrovik_send_queue_wait_seconds", "Ожидание в очереди отправки")
+SEND_RETRIES = registry.counter("kadrovik_send_retries_total", "Повторов отправки после 429")
+
+
+async def metrics_handler(request):
+    from aiohttp import web
+
+    return web.Response(
+        text=registry.render(),
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+    )
+
+
+async def start_metrics_server(host, port):
+    """Локальный HTTP-сервер с эндпоинтом /metrics.
+
+    aiohttp.web импортируется здесь: без METRICS_PORT он боту не нужен.
+    """
+    from aiohttp import web
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
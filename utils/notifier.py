@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError
+from middlewares import bulk_sends
+from settings import NOTIFY_BATCH
+from utils.documents import cached_file_id, send_document_to
+from utils.formatters import article_id, render_notification
+from utils.parser import fetch_article_content
+
+logger = logging.getLogger(__name__)
+
+
+class Notifier:
+    """Рассылка новых статей подписчикам.
+
+    Для каждой статьи текст уведомления собирается один раз, файл загружается в Telegram
+    один раз (первому подписчику), остальным он уходит по file_id. Отправки идут через
+    SendScheduler с низким приоритетом, пачками по batch_size: ответы пользователям
+    не ждут окончания рассылки.
+    """
+
+    def __init__(self, bot, users, batch_size=NOTIFY_BATCH):
+        self.bot = bot
+        self.users = users
+        self.batch_size = batch_size
+        self._tasks = set()
+
+    def schedule(self, lang, articles):
+        """Запускает рассылку в фоне (вызывается обновлением ленты)."""
+        task = asyncio.create_task(self.notify(lang, articles))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def notify(self, lang, articles):
+        for article in articles:
+            try:
+                await self._fan_out(lang, article)
+            except Exception as e:
+                logger.error("Ошибка рассылки", extra={"url": article["url"], "error": str(e)})
+
+    async def _fan_out(self, lang, article):
+        subscribers = await self.users.subscribers(lang)
+        if not subscribers:
+            return
+        content = await fetch_article_content(article["url"])
+        if content and len(content) <= 50:
+            content = None
+        caption = render_notification(article)
+        filename = f"article_{article_id(article['url'])}.txt"
+
+        async def deliver(user_id, document=None):
+            try:
+                if document:
+                    await self.bot.send_document(int(user_id), document, caption=caption, parse_mode="Markdown")
+                elif content:
+                    await send_document_to(self.bot, int(user_id), content, filename, caption)
+                else:
+                    await self.bot.send_message(int(user_id), caption, parse_mode="Markdown")
+                return True
+            except TelegramForbiddenError:
+                # Пользователь заблокировал бота - больше ему не пишем
+                await self.users.set_subscription(user_id, lang, False)
+            except TelegramAPIError as e:
+                logger.warning("Не удалось отправить уведомление", extra={"chat_id": user_id, "error": str(e)})
+            return False
+
+        sent = 0
+        with bulk_sends():
+            # До первой успешной отправки - по одному: так файл загружается ровно один раз
+            rest = []
+            for index, user_id in enumerate(subscribers):
+                if await deliver(user_id):
+                    sent += 1
+                    rest = subscribers[index + 1:]
+                    break
+            document = await cached_file_id(content) if content else None
+            for start in range(0, len(rest), self.batch_size):
+                batch = rest[start:start + self.batch_size]
+                results = await asyncio.gather(*(deliver(user_id, document) for user_id in batch))
+                sent += sum(results)
+        logger.info("Рассылка завершена", extra={
+            "url": article["url"], "lang": lang, "count": sent, "subscribers": len(subscribers)
+        })
+
+    async def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -1,143 +1,235 @@
-import aiohttp
-from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
+import asyncio
+import logging
 import time
 from utils.storage import load_cache, save_cache
+from utils.http import fetch_conditional, stream_text
+from utils.singleflight import flight
+from utils.extract import extract_articles, extract_article_content, run_in_parser_pool, ArticleStreamParser
+from utils.search_index import search_index, normalize_query
+from utils.formatters import article_id
+from utils.archive import archive
+from settings import KADROVIK_BASE_URL, LATEST_REFRESH_INTERVAL, MAX_ARTICLES, SEARCH_MIN_RESULTS, SUPPORTED_LANGUAGES
+
+logger = logging.getLogger(__name__)
+
+def site_url(lang):
+    """Адрес раздела сайта для языка: русская версия в корне, остальные - в /{lang}/."""
+    return KADROVIK_BASE_URL if lang == "ru" else f"{KADROVIK_BASE_URL}{lang}/"
 
 async def fetch_articles_from_site(query=None, lang="ru", limit=10):
     """Получение списка статей с сайта Kadrovik.uz"""
     start_time = time.time()
-    base_url = "https://kadrovik.uz/" if lang == "ru" else "https://kadrovik.uz/uz/"
-    url = base_url if not query else f"{base_url}search?q={query}"
-    print(f"{datetime.now()}: Начало парсинга URL: {url}")
+    base_url = site_url(lang)
+    # На сайт уходит запрос как его ввёл пользователь, нормализованный - только в ключ кэша
+    url = base_url if not query else f"{base_url}search"
+    params = {"q": query} if query else None
+    logger.info("Начало парсинга", extra={"url": url, "query": query})
+    cache_key = f"latest_{lang}" if not query else f"search_{normalize_query(query)}_{lang}"
+    cached = await load_cache(cache_key) if not query else None
     
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=6)) as response:
-                response.raise_for_status()
-                text = await response.text()
-                soup = BeautifulSoup(text, "html.parser")
-
-        articles = []
-        posts_section = soup.select_one("section.posts-block ul.posts-list")
-        if posts_section:
-            for item in posts_section.select("li.post-card-wrapper")[:limit]:
-                article_link = item.select_one("a[href]")
-                if article_link:
-                    title = item.select_one("h4.post-card__title")
-                    date_elem = item.select_one("time.longread-post__time-published")
-                    title_text = title.text.strip() if title else "Без заголовка"
-                    date_text = date_elem["datetime"] if date_elem else datetime.now().isoformat()
-                    link = article_link["href"]
-                    if not link.startswith("http"):
-                        link = base_url.rstrip("/") + "/" + link.lstrip("/")
-                    
-                    articles.append({
-                        "title": title_text,
-                        "content": "",  # Убираем вызов fetch_article_content
-                        "date": date_text,
-                        "emoji": "📰",
-                        "url": link
-                    })
+        # Условный запрос: если лента не изменилась, сайт ответит 304
+        text, etag, last_modified = await fetch_conditional(
+            url,
+            etag=cached.get("etag") if cached else None,
+            last_modified=cached.get("last_modified") if cached else None,
+            timeout=6,
+            params=params
+        )
+        if text is None:
+            logger.info("Страница не изменилась", extra={"url": url, "elapsed": round(time.time() - start_time, 2)})
+            await save_cache(cache_key, cached["data"], etag=etag, last_modified=last_modified)
+            return cached["data"]
+        articles = await run_in_parser_pool(extract_articles, text, base_url, limit)
+        search_index.add_articles(articles, lang)
 
         if not articles:
-            print(f"{datetime.now()}: Не удалось найти статьи по URL: {url}")
-        print(f"{datetime.now()}: Парсинг завершен. Время: {time.time() - start_time:.2f} сек. Найдено статей: {len(articles)}")
+            logger.warning("Не удалось найти статьи", extra={"url": url})
+        logger.info("Парсинг завершен", extra={
+            "url": url, "elapsed": round(time.time() - start_time, 2), "count": len(articles)
+        })
         
         # Сохраняем в кэш
-        cache = load_cache()
-        cache_key = f"latest_{lang}" if not query else f"search_{query}_{lang}"
-        cache[cache_key] = {
-            "timestamp": datetime.now().isoformat(),
-            "data": articles
-        }
-        save_cache(cache)
+        await save_cache(cache_key, articles, etag=etag, last_modified=last_modified)
+        # Статьи ленты доступны по стабильному id (кнопки списка)
+        if not query:
+            for article in articles:
+                await save_cache(f"ref_{article_id(article['url'])}", article)
         return articles
     except Exception as e:
-        print(f"{datetime.now()}: Ошибка при парсинге сайта: {e}. Время: {time.time() - start_time:.2f} сек")
-        cache = load_cache()
-        cache_key = f"latest_{lang}" if not query else f"search_{query}_{lang}"
-        return cache.get(cache_key, {}).get("data", [])
+        logger.error("Ошибка при парсинге сайта", extra={
+            "url": url, "error": str(e), "elapsed": round(time.time() - start_time, 2)
+        })
+        entry = await load_cache(cache_key)
+        return entry["data"] if entry else []
 
 async def fetch_article_content(url):
+    """Загрузка статьи: сначала из кэша, одновременные запросы одного URL объединяются"""
+    entry = await load_cache(f"article_{url}")
+    if entry:
+        flight.hit()
+        return entry["data"]
+    return await flight.do(url, _fetch_article_content, url)
+
+async def stream_article_paragraphs(url):
+    """Абзацы статьи по мере загрузки страницы (без кэша).
+
+    Страница читается порциями, загрузка прекращается сразу после блока статьи.
+    """
+    parser = ArticleStreamParser()
+    chunks = stream_text(url, timeout=10)
+    try:
+        async for chunk in chunks:
+            # Порция не больше HTTP_STREAM_CHUNK - разбор не задерживает event loop надолго
+            for piece in parser.push(chunk):
+                yield piece
+            if parser.done:
+                return
+    finally:
+        await chunks.aclose()
+    for piece in parser.finish():
+        yield piece
+    if not parser.found_block:
+        # Нет блока статьи - полный разбор страницы в пуле
+        yield await run_in_parser_pool(extract_article_content, "".join(parser.html))
+
+async def download_article_content(url):
+    """Загрузка и разбор статьи без кэша (используется и обходчиком архива)"""
+    return "".join([piece async for piece in stream_article_paragraphs(url)])
+
+async def _fetch_article_content(url):
     """Парсер с правильными переносами строк после emoji и абзацев"""
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers, timeout=10) as response:
-                response.raise_for_status()
-                html = await response.text()
-        
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # 1. Заголовок и дата (без #)
-        title = soup.find('h1').get_text(strip=True) if soup.find('h1') else "Без заголовка"
-        date_elem = soup.find('time', {'class': 'longread-post__time-published'})
-        date = date_elem['datetime'] if date_elem else ""
-        
-        # 2. Ищем контейнер с контентом
-        content_block = soup.find('section', {'class': 'longread-block'}) or soup.find('body')
-        
-        if not content_block:
-            return f"📰 {title}\n📅 {date}\n\nНе удалось найти контент."
-        
-        # 3. Собираем только <p> и <strong>
-        elements = content_block.find_all(['p', 'strong'])
-        result = [f"📰 {title}", f"📅 {date}"]
-        
-        for element in elements:
-            text = element.get_text(' ', strip=True)
-            if text:
-                if element.name == 'strong':
-                    result.append(f"\n🔹 {text}\n")  # Новый абзац для 🔹
-                else:
-                    result.append(f"\n{text}")       # Новый абзац для обычного текста
-        
-        # 4. Объединяем и удаляем дубликаты
-        content = ''.join(dict.fromkeys(result))
+        # Статья уже есть в локальной копии архива - сайт не нужен
+        content = await archive.get_content(url)
+        if content:
+            await save_cache(f"article_{url}", content)
+            return content
+
+        content = await download_article_content(url)
         
-        return content if len(content) > 50 else "Не удалось извлечь текст."
+        if len(content) > 50:
+            await save_cache(f"article_{url}", content)
+            search_index.add_body(url, content)
+            return content
+        return "Не удалось извлечь текст."
     
     except Exception as e:
-        print(f"Ошибка: {e}")
+        logger.error("Ошибка загрузки статьи", extra={"url": url, "error": str(e)})
         return None
 
+async def stream_article_content(url):
+    """Текст статьи частями для постепенной отправки.
+
+    Из кэша или архива текст приходит сразу целиком, иначе - абзацами по мере загрузки
+    страницы; загруженный текст сохраняется в кэш. Загрузка идёт через flight: остальные
+    запросы того же URL ждут её результат, а не скачивают страницу ещё раз.
+    """
+    entry = await load_cache(f"article_{url}")
+    if entry:
+        flight.hit()
+        yield entry["data"]
+        return
+    if flight.in_flight(url):
+        # Статью уже загружает другой запрос - ждём его результат
+        content = await fetch_article_content(url)
+        if content:
+            yield content
+        return
+    content = await archive.get_content(url)
+    if content:
+        await save_cache(f"article_{url}", content)
+        yield content
+        return
+
+    # Загрузка - отдельной задачей под flight, абзацы передаются сюда через очередь
+    # (None - конец). Задача доводит загрузку до конца, даже если читатель ушёл раньше
+    queue = asyncio.Queue()
+    streamed = False
+
+    async def download():
+        nonlocal streamed
+        streamed = True
+        pieces = []
+        async for piece in stream_article_paragraphs(url):
+            pieces.append(piece)
+            queue.put_nowait(piece)
+        content = "".join(pieces)
+        if len(content) > 50:
+            await save_cache(f"article_{url}", content)
+            search_index.add_body(url, content)
+            return content
+        return "Не удалось извлечь текст."
+
+    task = asyncio.create_task(flight.do(url, download))
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    while True:
+        piece = await queue.get()
+        if piece is None:
+            break
+        yield piece
+    content = await task
+    if not streamed and content:
+        # Статью загрузил параллельный запрос (в том числе в другом процессе)
+        yield content
+
 async def search_articles(query, lang):
-    """Поиск статей по запросу"""
-    cache = load_cache()
-    cache_key = f"search_{query}_{lang}"
+    """Поиск статей: локальный индекс, сайт - только для «холодных» запросов"""
+    normalized = normalize_query(query)
+    cache_key = f"search_{normalized}_{lang}"
     
-    # Проверяем кэш
-    if cache_key in cache:
-        entry = cache[cache_key]
-        timestamp = entry.get("timestamp")
-        if timestamp and (datetime.now() - datetime.fromisoformat(timestamp)) < timedelta(hours=24):
-            print(f"{datetime.now()}: Используем кэшированные данные для запроса: {query}")
-            return entry["data"]
+    # Запрос уже искали на сайте (его результаты в индексе) или индекс нашёл достаточно
+    # статей со всеми словами запроса (одно частое слово не заменяет поиск на сайте)
+    entry = await load_cache(cache_key)
+    fresh = entry and entry.get("timestamp") and (
+        datetime.now() - datetime.fromisoformat(entry["timestamp"])) < timedelta(hours=24)
+    results = search_index.search(normalized, lang, limit=MAX_ARTICLES, match_all=not fresh)
+    if fresh or len(results) >= SEARCH_MIN_RESULTS:
+        logger.info("Ответ из локального индекса", extra={"query": normalized, "lang": lang})
+        flight.hit()
+        return results or entry["data"]
 
-    print(f"{datetime.now()}: Парсинг сайта для запроса: {query}")
-    articles = await fetch_articles_from_site(query, lang)
+    logger.info("Парсинг сайта для запроса", extra={"query": normalized, "lang": lang})
+    articles = await flight.do(cache_key, fetch_articles_from_site, query, lang)
     return articles
 
 async def get_latest_articles(lang):
     """Получение последних статей"""
-    cache = load_cache()
     cache_key = f"latest_{lang}"
     
-    # Проверяем кэш
-    if cache_key in cache:
-        entry = cache[cache_key]
+    # Проверяем кэш: устаревшие данные отдаём сразу и обновляем их в фоне
+    entry = await load_cache(cache_key)
+    if entry:
+        flight.hit()
         timestamp = entry.get("timestamp")
-        if timestamp and (datetime.now() - datetime.fromisoformat(timestamp)) < timedelta(hours=24):
-            print(f"{datetime.now()}: Используем кэшированные данные для последних статей ({lang})")
-            return entry["data"]
+        if timestamp and (datetime.now() - datetime.fromisoformat(timestamp)) < timedelta(seconds=LATEST_REFRESH_INTERVAL):
+            logger.info("Последние статьи из кэша", extra={"lang": lang})
+        else:
+            logger.info("Данные устарели, обновляем в фоне", extra={"lang": lang})
+            flight.spawn(cache_key, fetch_articles_from_site, lang=lang)
+        return entry["data"]
+
+    # Кэш пуст, но архив уже скачан: отвечаем из него и обновляем ленту в фоне
+    archived = await archive.latest(lang, MAX_ARTICLES)
+    if archived:
+        logger.info("Последние статьи из архива", extra={"lang": lang})
+        flight.spawn(cache_key, fetch_articles_from_site, lang=lang)
+        return archived
+
+    logger.info("Парсинг сайта для последних статей", extra={"lang": lang})
+    articles = await flight.do(cache_key, fetch_articles_from_site, lang=lang)
+    return articles
 
-    print(f"{datetime.now()}: Парсинг сайта для последних статей ({lang})")
-    articles = await fetch_articles_from_site(lang=lang)
-    return articles
\ No newline at end of file
+async def get_article_by_id(ref_id):
+    """Статья из ленты по id из callback_data"""
+    entry = await load_cache(f"ref_{ref_id}")
+    if entry:
+        return entry["data"]
+    # Ссылки ещё не сохранены (лента из старого кэша) - ищем в текущих лентах
+    for lang in SUPPORTED_LANGUAGES:
+        latest = await load_cache(f"latest_{lang}")
+        for article in latest["data"] if latest else []:
+            if article_id(article["url"]) == ref_id:
+                return article
+    return await archive.get_by_id(ref_id)
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from settings import PROFILE_SECONDS, PROFILE_INTERVAL, PROFILE_DIR
+
+# Сэмплирующий профайлер event loop: по сигналу (kill -USR1 <pid>) отдельный поток
+# PROFILE_SECONDS секунд снимает стек потока с event loop и сохраняет результат
+# в формате folded stacks - его понимают flamegraph.pl и speedscope.
+
+logger = logging.getLogger(__name__)
+
+_running = threading.Lock()
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def sample_stacks(thread_id, duration=PROFILE_SECONDS, interval=PROFILE_INTERVAL):
+    """Собирает стеки потока thread_id: {"a;b;c": число попаданий}."""
+    counts = Counter()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        stack = []
+        while frame is not None:
+            stack.append(_frame_name(frame))
+            frame = frame.f_back
+        if stack:
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return counts
+
+
+def dump_profile(thread_id, duration=PROFILE_SECONDS, interval=PROFILE_INTERVAL, directory=PROFILE_DIR):
+    counts = sample_stacks(thread_id, duration, interval)
+    path = os.path.join(directory, f"profile-{os.getpid()}-{int(time.time())}.folded")
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in counts.most_common():
+            f.write(f"{stack} {count}\n")
+    logger.info("Профиль сохранён", extra={"path": path, "samples": sum(counts.values())})
+    return path
+
+
+def start_profile(thread_id):
+    """Запускает профилирование в фоне (одновременно - не больше одного)."""
+    if not _running.acquire(blocking=False):
+        logger.info("Профилирование уже выполняется")
+        return
+
+    def run():
+        try:
+            dump_profile(thread_id)
+        finally:
+            _running.release()
+
+    threading.Thread(target=run, name="profiler", daemon=True).start()
+
+
+def install_profiler_signal(sig=getattr(signal, "SIGUSR1", None)):
+    """Включает профилирование event loop по сигналу (только Unix)."""
+    if sig is None:
+        return
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(sig, start_profile, threading.get_ident())
+    except (NotImplementedError, RuntimeError):
+        logger.warning("Сигнал профилирования не поддерживается")
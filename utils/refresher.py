@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from settings import (
+    SUPPORTED_LANGUAGES, LATEST_REFRESH_INTERVAL, PREFETCH_CONCURRENCY, MAX_ARTICLES, ARTICLES_PAGE_SIZE,
+)
+from utils.formatters import render_latest_page
+from utils.parser import fetch_articles_from_site, fetch_article_content, get_latest_articles
+from utils.singleflight import flight
+from utils.storage import load_cache, save_cache
+
+logger = logging.getLogger(__name__)
+
+_task = None
+
+# Сколько адресов разосланных статей помнить на язык (лента - MAX_ARTICLES статей)
+NOTIFIED_MAX = 200
+
+
+async def prefetch_articles(articles):
+    """Загружает в кэш тексты статей, которых там ещё нет."""
+    semaphore = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+
+    async def prefetch(article):
+        async with semaphore:
+            if await load_cache(f"article_{article['url']}") is None:
+                await fetch_article_content(article["url"])
+
+    await asyncio.gather(*(prefetch(article) for article in articles))
+
+
+async def refresh_latest(lang):
+    """Обновляет ленту latest_{lang} и подгружает тексты новых статей.
+
+    Возвращает статьи, о которых подписчики ещё не уведомлены. Сравнение идёт с notified_{lang},
+    а не с прошлой лентой: ленту latest_{lang} обновляют и запросы пользователей (в фоне),
+    и другие процессы. При первом запуске текущая лента считается уже разосланной.
+    """
+    notified = await load_cache(f"notified_{lang}")
+    articles = await flight.do(f"latest_{lang}", fetch_articles_from_site, lang=lang)
+    if notified is None:
+        if articles:
+            await mark_notified(lang, articles)
+        new_articles = []
+    else:
+        known = set(notified["data"])
+        new_articles = [article for article in articles if article["url"] not in known]
+    if new_articles:
+        logger.info("Новые статьи", extra={"lang": lang, "count": len(new_articles)})
+    await prefetch_articles(articles)
+    return new_articles
+
+
+async def mark_notified(lang, articles):
+    """Запоминает разосланные статьи (последние NOTIFIED_MAX адресов)."""
+    notified = await load_cache(f"notified_{lang}")
+    urls = [article["url"] for article in articles]
+    for url in notified["data"] if notified else []:
+        if url not in urls:
+            urls.append(url)
+    # ttl=0 - без срока: после тихой недели без новых статей список не должен пропасть,
+    # иначе следующая статья будет принята за первый запуск и не разослана
+    await save_cache(f"notified_{lang}", urls[:NOTIFIED_MAX], ttl=0)
+
+
+async def warm_language(lang):
+    """Лента языка и её готовые страницы - до первого запроса пользователя.
+
+    Лента берётся из кэша или архива, если они есть; с сайта - только при пустых обоих.
+    """
+    articles = (await get_latest_articles(lang) or [])[:MAX_ARTICLES]
+    pages = max(1, -(-len(articles) // ARTICLES_PAGE_SIZE))
+    for page in range(pages):
+        render_latest_page(articles, lang, page)
+    return len(articles)
+
+
+async def warm_languages(languages=SUPPORTED_LANGUAGES):
+    """Прогрев всех языков параллельно (вызывается при старте бота).
+
+    После него переключение языка пользователем не приводит к загрузке ленты с сайта.
+    """
+    results = await asyncio.gather(*(warm_language(lang) for lang in languages), return_exceptions=True)
+    for lang, result in zip(languages, results):
+        if isinstance(result, Exception):
+            logger.error("Ошибка прогрева ленты", extra={"lang": lang, "error": str(result)})
+        else:
+            logger.info("Лента прогрета", extra={"lang": lang, "count": result})
+
+
+async def _refresh(lang, on_new_articles):
+    try:
+        new_articles = await refresh_latest(lang)
+        if new_articles:
+            if on_new_articles:
+                on_new_articles(lang, new_articles)
+            await mark_notified(lang, new_articles)
+    except Exception as e:
+        logger.error("Ошибка фонового обновления", extra={"lang": lang, "error": str(e)})
+
+
+async def refresh_loop(interval=LATEST_REFRESH_INTERVAL, on_new_articles=None):
+    """Периодически обновляет ленты всех языков (параллельно).
+
+    on_new_articles(lang, articles) вызывается, когда в ленте появились новые статьи.
+    """
+    while True:
+        await asyncio.gather(*(_refresh(lang, on_new_articles) for lang in SUPPORTED_LANGUAGES))
+        await asyncio.sleep(interval)
+
+
+def start_refresher(interval=LATEST_REFRESH_INTERVAL, on_new_articles=None):
+    """Запускает фоновое обновление (вызывается при старте бота)."""
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(refresh_loop(interval, on_new_articles))
+    return _task
+
+
+async def stop_refresher():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -0,0 +1,217 @@
+import hashlib
+import heapq
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from settings import SUPPORTED_LANGUAGES
+
+logger = logging.getLogger(__name__)
+
+# Локальный полнотекстовый индекс (BM25) по статьям, которые уже загружал парсер.
+# Индекс отдельный для каждого языка: у ru и uz разная нормализация слов.
+
+TOKEN_RE = re.compile(r"[\w']+")
+APOSTROPHES = str.maketrans({"ʻ": "'", "ʼ": "'", "‘": "'", "’": "'", "`": "'", "ё": "е"})
+
+STOPWORDS = {
+    "ru": {"и", "в", "во", "на", "по", "с", "со", "для", "не", "что", "как", "о", "об", "от",
+           "за", "до", "к", "ко", "из", "при", "или", "а", "но", "это", "же", "ли", "у"},
+    "uz": {"va", "bilan", "uchun", "bu", "u", "ham", "yoki", "esa", "deb", "qanday", "nima"},
+}
+
+RU_ENDINGS = sorted([
+    "иями", "ями", "ами", "иях", "ого", "его", "ому", "ему", "ыми", "ими", "ениям", "ение",
+    "ения", "ений", "ость", "ости", "ей", "ой", "ий", "ый", "ая", "яя", "ое", "ее", "ые",
+    "ие", "ых", "их", "ую", "юю", "ам", "ям", "ах", "ях", "ом", "ем", "ов", "ев", "ия",
+    "ии", "ию", "ть", "ти", "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й",
+], key=len, reverse=True)
+
+UZ_SUFFIXES = sorted([
+    "larining", "laridagi", "lardan", "larga", "larni", "larda", "lari", "ning", "dagi",
+    "gacha", "lar", "dan", "ga", "ka", "qa", "da", "ta", "ni", "si", "i",
+], key=len, reverse=True)
+
+K1 = 1.5
+B = 0.75
+TITLE_WEIGHT = 3
+
+
+def normalize_query(query):
+    """Нормализует запрос: регистр, ё/е, лишние пробелы (используется и в ключе кэша)."""
+    return " ".join(query.lower().translate(APOSTROPHES).split())
+
+
+def lang_from_url(url):
+    return "uz" if "/uz/" in url else "ru"
+
+
+def stem(word, lang):
+    """Лёгкий стеммер: отбрасывает типичные окончания/аффиксы."""
+    if lang == "uz":
+        for _ in range(2):
+            for suffix in UZ_SUFFIXES:
+                if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                    word = word[:-len(suffix)]
+                    break
+            else:
+                break
+        return word
+    for ending in RU_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= 3:
+            return word[:-len(ending)]
+    return word
+
+
+def analyze(text, lang):
+    """Текст -> список нормализованных основ."""
+    stopwords = STOPWORDS.get(lang, set())
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower().translate(APOSTROPHES)):
+        token = token.strip("'_")
+        if token and token not in stopwords:
+            tokens.append(stem(token, lang))
+    return tokens
+
+
+class SearchIndex:
+    """Инвертированный индекс одного языка с ранжированием BM25."""
+
+    def __init__(self, lang):
+        self.lang = lang
+        self.docs = {}                       # url -> {"title", "date", "body_hash"}
+        self.postings = defaultdict(dict)    # term -> {url: tf}
+        self.lengths = {}                    # url -> длина документа в терминах
+        self.doc_terms = {}                  # url -> термы документа (для обновления)
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _remove(self, url):
+        length = self.lengths.pop(url, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for term in self.doc_terms.pop(url, ()):
+            postings = self.postings[term]
+            postings.pop(url, None)
+            if not postings:
+                del self.postings[term]
+
+    def _body_counts(self, url, title):
+        # Термы текста = термы документа минус термы заголовка (сам текст не хранится)
+        counts = Counter({term: self.postings[term][url] for term in self.doc_terms.get(url, ())})
+        counts.subtract(Counter(analyze(title, self.lang) * TITLE_WEIGHT))
+        return +counts
+
+    def add(self, url, title=None, date=None, body=None):
+        """Добавляет или обновляет документ (поля, которые не переданы, сохраняются).
+
+        Вместо текста статьи хранится его хэш - только чтобы не переиндексировать тот же текст.
+        """
+        old = self.docs.get(url, {"title": "Без заголовка", "date": "", "body_hash": None})
+        doc = {
+            "title": title or old["title"],
+            "date": date or old["date"],
+            "body_hash": hashlib.sha1(body.encode("utf-8")).digest() if body is not None else old["body_hash"],
+        }
+        if self.docs.get(url) == doc:
+            return
+        if body is not None:
+            body_counts = Counter(analyze(body, self.lang))
+        else:
+            body_counts = self._body_counts(url, old["title"])
+        self._remove(url)
+        self.docs[url] = doc
+
+        counts = Counter(analyze(doc["title"], self.lang) * TITLE_WEIGHT) + body_counts
+        for term, tf in counts.items():
+            self.postings[term][url] = tf
+        length = sum(counts.values())
+        self.doc_terms[url] = list(counts)
+        self.lengths[url] = length
+        self.total_length += length
+
+    def search(self, query, limit=10, prefix=False, match_all=False):
+        """Ищет документы; prefix=True - термы запроса сравниваются как префиксы,
+        match_all=True - только документы, в которых есть все термы запроса."""
+        if not self.docs:
+            return []
+        n = len(self.docs)
+        avgdl = self.total_length / n or 1
+        scores = defaultdict(float)
+        query_terms = set(analyze(query, self.lang))
+        found = defaultdict(set)             # url -> найденные термы запроса
+        for term in query_terms:
+            if prefix:
+                matched = [t for t in self.postings if t.startswith(term)]
+            else:
+                matched = [term] if term in self.postings else []
+            for t in matched:
+                postings = self.postings[t]
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for url, tf in postings.items():
+                    norm = K1 * (1 - B + B * self.lengths[url] / avgdl)
+                    scores[url] += idf * tf * (K1 + 1) / (tf + norm)
+                    found[url].add(term)
+
+        if match_all:
+            scores = {url: score for url, score in scores.items() if len(found[url]) == len(query_terms)}
+        ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [
+            {
+                "title": self.docs[url]["title"],
+                "content": "",
+                "date": self.docs[url]["date"],
+                "emoji": "📰",
+                "url": url
+            }
+            for url, _ in ranked
+        ]
+
+
+class MultiLangIndex:
+    """Набор индексов по языкам."""
+
+    def __init__(self, languages=SUPPORTED_LANGUAGES):
+        self.indexes = {lang: SearchIndex(lang) for lang in languages}
+
+    def get(self, lang):
+        if lang not in self.indexes:
+            self.indexes[lang] = SearchIndex(lang)
+        return self.indexes[lang]
+
+    def add_articles(self, articles, lang):
+        """Добавляет статьи из ленты или результатов поиска (заголовки)."""
+        index = self.get(lang)
+        for article in articles:
+            index.add(article["url"], title=article["title"], date=article["date"])
+
+    def add_body(self, url, content):
+        """Добавляет текст статьи из fetch_article_content."""
+        self.get(lang_from_url(url)).add(url, body=content)
+
+    def search(self, query, lang, limit=10, prefix=False, match_all=False):
+        return self.get(lang).search(query, limit=limit, prefix=prefix, match_all=match_all)
+
+
+search_index = MultiLangIndex()
+
+
+async def rebuild_index(cache_items, archive_items=None):
+    """Заполняет индекс при старте из записей кэша ((key, entry) для latest_/search_/article_)
+    и статей локального архива (асинхронный итератор, см. ArchiveStore.items)."""
+    if archive_items is not None:
+        async for article in archive_items:
+            search_index.get(article["lang"]).add(
+                article["url"], title=article["title"], date=article["date"], body=article["content"]
+            )
+    for key, entry in cache_items:
+        if key.startswith("article_"):
+            search_index.add_body(key[len("article_"):], entry["data"])
+        elif key.startswith(("latest_", "search_")):
+            search_index.add_articles(entry["data"], key.rsplit("_", 1)[1])
+    logger.info("Поисковый индекс построен", extra={
+        f"docs_{lang}": len(index) for lang, index in search_index.indexes.items()
+    })
@@ -0,0 +1,217 @@
+import asyncio
+import fnmatch
+import json
+import time
+import uuid
+from datetime import timedelta
+from settings import REDIS_URL, FSM_STORAGE, CACHE_TTL, CHAT_LOCK_TTL
+
+# Общие хранилища для нескольких процессов бота. Код работает с подмножеством
+# команд Redis (get/set/delete/scan_iter/eval), поэтому вместо настоящего Redis
+# можно подставить MemoryKV (REDIS_URL=memory://) - например, в проверках.
+
+_redis = None
+
+# Снятие блокировки: ключ удаляется, только если в нём всё ещё наш токен.
+# Проверка и удаление выполняются в Redis атомарно
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def _seconds(value):
+    if value is None:
+        return None
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return float(value)
+
+
+class MemoryKV:
+    """Локальная замена Redis: работает только внутри одного процесса."""
+
+    def __init__(self):
+        self._data = {}  # key -> (value, expires_at)
+
+    def _alive(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key):
+        return self._alive(key)
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and self._alive(key) is not None:
+            return None
+        ttl = _seconds(ex) if ex is not None else (_seconds(px) / 1000 if px is not None else None)
+        self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+        return True
+
+    async def delete(self, *keys):
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    async def eval(self, script, numkeys, *keys_and_args):
+        """Поддерживается только RELEASE_SCRIPT (атомарен: внутри нет await)."""
+        if script != RELEASE_SCRIPT:
+            raise NotImplementedError("MemoryKV выполняет только RELEASE_SCRIPT")
+        key, token = keys_and_args
+        if self._alive(key) == token:
+            del self._data[key]
+            return 1
+        return 0
+
+    async def scan_iter(self, match=None):
+        for key in list(self._data):
+            if self._alive(key) is not None and (match is None or fnmatch.fnmatchcase(key, match)):
+                yield key
+
+    async def aclose(self, close_connection_pool=True):
+        pass
+
+
+def get_redis():
+    """Общий клиент Redis (создаётся при первом обращении, в каждом процессе свой)."""
+    global _redis
+    if _redis is None:
+        if REDIS_URL.startswith("memory://"):
+            _redis = MemoryKV()
+        else:
+            import redis.asyncio as redis
+            _redis = redis.from_url(REDIS_URL, decode_responses=True)
+    return _redis
+
+
+async def close_redis():
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+
+class RedisCacheStore:
+    """Кэш парсера в Redis - общий для всех процессов.
+
+    Интерфейс совпадает с utils.storage.CacheStore. Вытеснение по размеру
+    настраивается на стороне Redis (maxmemory-policy allkeys-lru).
+    """
+
+    def __init__(self, client=None, prefix="cache:", default_ttl=CACHE_TTL):
+        self._client = client
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+
+    @property
+    def client(self):
+        return self._client or get_redis()
+
+    async def warm(self):
+        pass
+
+    async def get(self, key):
+        value = await self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key, entry, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        await self.client.set(self.prefix + key, json.dumps(entry, ensure_ascii=False), ex=ttl or None)
+
+    async def delete(self, key):
+        await self.client.delete(self.prefix + key)
+
+    async def items(self, prefix=""):
+        result = []
+        async for full_key in self.client.scan_iter(match=f"{self.prefix}{prefix}*"):
+            value = await self.client.get(full_key)
+            if value is not None:
+                result.append((full_key[len(self.prefix):], json.loads(value)))
+        return result
+
+    async def close(self):
+        pass
+
+
+class SharedLock:
+    """Блокировка между процессами: SET NX с TTL и токеном владельца.
+
+    TTL снимает блокировку упавшего процесса. Снимается она только владельцем
+    (RELEASE_SCRIPT): чужую, взятую после истечения нашего TTL, не трогаем.
+    Используется в SharedChatLock и SharedSingleFlight.
+    """
+
+    def __init__(self, client, key, ttl, poll_interval):
+        self.client = client
+        self.key = key
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.token = uuid.uuid4().hex
+
+    async def try_acquire(self):
+        return bool(await self.client.set(self.key, self.token, px=int(self.ttl * 1000), nx=True))
+
+    async def acquire(self):
+        while not await self.try_acquire():
+            await asyncio.sleep(self.poll_interval)
+
+    async def wait_released(self, timeout=None):
+        """Ждёт, пока блокировку снимут (или истечёт timeout)."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while await self.client.get(self.key) is not None:
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    async def release(self):
+        await self.client.eval(RELEASE_SCRIPT, 1, self.key, self.token)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.release()
+
+
+class SharedChatLock:
+    """Блокировка чата между процессами (SharedLock на ключ чата).
+
+    Гарантирует, что апдейты одного чата не обрабатываются одновременно в разных
+    процессах (иначе обработчик может прочитать устаревшее состояние FSM).
+    Порядок внутри процесса обеспечивает ChatOrderMiddleware.
+    """
+
+    def __init__(self, client=None, ttl=CHAT_LOCK_TTL, poll_interval=0.05):
+        self._client = client
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+
+    @property
+    def client(self):
+        return self._client or get_redis()
+
+    def hold(self, chat_id):
+        return SharedLock(self.client, f"chat:lock:{chat_id}", self.ttl, self.poll_interval)
+
+
+def create_chat_lock(backend=FSM_STORAGE):
+    """Блокировка чата между процессами нужна только при общем хранилище FSM."""
+    if backend == "redis":
+        return SharedChatLock()
+    return None
+
+
+def create_fsm_storage(backend=FSM_STORAGE):
+    """Хранилище состояний FSM: memory (один процесс) или redis (общее)."""
+    if backend == "redis":
+        from aiogram.fsm.storage.redis import RedisStorage
+        return RedisStorage(redis=get_redis())
+    from aiogram.fsm.storage.memory import MemoryStorage
+    return MemoryStorage()
@@ -0,0 +1,122 @@
+import asyncio
+import json
+import logging
+from settings import FLIGHT_BACKEND, FLIGHT_LOCK_TTL
+from utils.shared import SharedLock, get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Объединяет одновременные запросы с одинаковым ключом в один."""
+
+    def __init__(self):
+        self._inflight = {}
+        self._background = {}  # key -> фоновая задача (ещё могла не начать выполняться)
+        self.stats = {"hits": 0, "coalesced": 0, "misses": 0}
+
+    def hit(self):
+        """Отмечает ответ из кэша (без обращения к сайту)."""
+        self.stats["hits"] += 1
+
+    async def do(self, key, func, *args, **kwargs):
+        """Выполняет func один раз на ключ; остальные вызовы ждут тот же результат."""
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future)
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Исключение уже передано ожидающим, не логируем его повторно
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def spawn(self, key, func, *args, **kwargs):
+        """Запускает func в фоне, если по этому ключу ещё ничего не выполняется."""
+        # Задача попадает в _inflight только когда начнёт выполняться - учитываем и запущенные
+        if key in self._inflight or key in self._background:
+            return None
+        task = asyncio.create_task(self.do(key, func, *args, **kwargs))
+        self._background[key] = task
+        task.add_done_callback(lambda done: self._background_done(key, done))
+        return task
+
+    def _background_done(self, key, task):
+        if self._background.get(key) is task:
+            del self._background[key]
+        if not task.cancelled() and task.exception():
+            logger.error("Ошибка фонового обновления", extra={"error": str(task.exception())})
+
+    def in_flight(self, key):
+        return key in self._inflight
+
+
+class SharedSingleFlight(SingleFlight):
+    """Single-flight между процессами: блокировка и результат хранятся в Redis.
+
+    Внутри процесса вызовы объединяются как обычно, между процессами - через
+    блокировку SET NX. Остальные процессы ждут её снятия и берут сохранённый
+    результат (он должен сериализоваться в JSON).
+    """
+
+    def __init__(self, client=None, lock_ttl=30, poll_interval=0.1):
+        super().__init__()
+        self._client = client
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_redis()
+        return self._client
+
+    async def do(self, key, func, *args, **kwargs):
+        return await super().do(key, self._shared_call, key, func, *args, **kwargs)
+
+    async def _shared_call(self, key, func, *args, **kwargs):
+        result_key = f"flight:result:{key}"
+        lock = SharedLock(self.client, f"flight:lock:{key}", self.lock_ttl, self.poll_interval)
+        while True:
+            if await lock.try_acquire():
+                try:
+                    await self.client.delete(result_key)
+                    result = await func(*args, **kwargs)
+                    await self.client.set(
+                        result_key, json.dumps(result, ensure_ascii=False), px=int(self.lock_ttl * 1000)
+                    )
+                    return result
+                finally:
+                    await lock.release()
+
+            # Запрос выполняет другой процесс - ждём его результат
+            await lock.wait_released(timeout=self.lock_ttl)
+            value = await self.client.get(result_key)
+            if value is not None:
+                self.stats["coalesced"] += 1
+                return json.loads(value)
+            # Другой процесс завершился без результата - пробуем сами
+
+
+def create_flight(backend=FLIGHT_BACKEND):
+    if backend == "redis":
+        return SharedSingleFlight(lock_ttl=FLIGHT_LOCK_TTL)
+    return SingleFlight()
+
+
+# Общий экземпляр для парсера
+flight = create_flight()
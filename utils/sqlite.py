@@ -0,0 +1,41 @@
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SQLiteStore:
+    """База SQLite (WAL) с одним потоком: запросы к ней выполняются строго по очереди.
+
+    Общая основа кэша, архива и хранилища пользователей. Наследник описывает схему
+    в _create и вызывает свои синхронные методы из асинхронных через _run.
+    """
+
+    def __init__(self, path, thread_name):
+        self.path = path
+        self._conn = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=thread_name)
+
+    # --- синхронная часть, выполняется в потоке базы ---
+
+    def _create(self, conn):
+        """Таблицы, индексы и миграции схемы (при первом подключении)."""
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._create(self._conn)
+            self._conn.commit()
+        return self._conn
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # --- асинхронный интерфейс ---
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
@@ -1,21 +1,219 @@
-import json
-import os
-from datetime import datetime
-
-def load_cache():
-    """Загружает кэш из файла."""
-    try:
-        if os.path.exists("cache.json"):
-            with open("cache.json", "r") as f:
-                return json.load(f)
-        return {}
-    except (json.JSONDecodeError, FileNotFoundError):
-        return {}
-
-def save_cache(cache):
-    """Сохраняет кэш в файл."""
-    try:
-        with open("cache.json", "w") as f:
-            json.dump(cache, f, indent=4)
-    except Exception as e:
-        print(f"{datetime.now()}: Ошибка при сохранении кэша: {e}")
\ No newline at end of file
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from settings import CACHE_DB_PATH, CACHE_MAX_ENTRIES, CACHE_TTL, CACHE_BACKEND
+from utils.metrics import CACHE_LATENCY, CACHE_REQUESTS
+from utils.sqlite import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# Старый файловый кэш, переносится в базу при первом запуске
+LEGACY_CACHE_FILE = "cache.json"
+
+# Время чтений записывается в базу пачками, а не на каждый get
+TOUCH_BATCH = 100
+
+
+class CacheStore(SQLiteStore):
+    """Кэш с индексом в памяти и сквозной записью в SQLite (WAL)."""
+
+    def __init__(self, path=CACHE_DB_PATH, max_entries=CACHE_MAX_ENTRIES, default_ttl=CACHE_TTL):
+        super().__init__(path, "cache-db")
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._index = OrderedDict()  # key -> (entry, expires_at), порядок = LRU
+        self._touched = {}           # key -> время чтения, ещё не записанное в базу
+        self._warmed = False
+
+    # --- синхронная часть, выполняется в потоке базы ---
+
+    def _create(self, conn):
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+
+    def _load_rows(self):
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        rows = conn.execute(
+            "SELECT key, value, expires_at FROM cache ORDER BY accessed_at DESC LIMIT ?",
+            (self.max_entries,)
+        ).fetchall()
+        if not rows:
+            rows = self._migrate_legacy(conn, now)
+        return rows
+
+    def _migrate_legacy(self, conn, now):
+        """Переносит записи из cache.json в базу (однократно, файл затем переименовывается)."""
+        if not os.path.exists(LEGACY_CACHE_FILE):
+            return []
+        try:
+            with open(LEGACY_CACHE_FILE, "r") as f:
+                legacy = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.error("Не удалось прочитать файл кэша", extra={"path": LEGACY_CACHE_FILE, "error": str(e)})
+            return []
+        expires_at = now + self.default_ttl if self.default_ttl else None
+        rows = [(key, json.dumps(entry, ensure_ascii=False), expires_at) for key, entry in legacy.items()]
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                [(key, value, exp, now) for key, value, exp in rows]
+            )
+        os.replace(LEGACY_CACHE_FILE, LEGACY_CACHE_FILE + ".migrated")
+        logger.info("Кэш перенесён в базу", extra={"path": LEGACY_CACHE_FILE, "entries": len(rows)})
+        return rows
+
+    def _write(self, key, value, expires_at, evicted, touched):
+        conn = self._connect()
+        with conn:
+            self._update_accessed(conn, touched)
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, time.time())
+            )
+            if evicted:
+                conn.executemany("DELETE FROM cache WHERE key = ?", [(k,) for k in evicted])
+
+    @staticmethod
+    def _update_accessed(conn, touched):
+        if touched:
+            conn.executemany(
+                "UPDATE cache SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in touched.items()]
+            )
+
+    def _touch(self, touched):
+        conn = self._connect()
+        with conn:
+            self._update_accessed(conn, touched)
+
+    def _delete(self, keys):
+        conn = self._connect()
+        with conn:
+            conn.executemany("DELETE FROM cache WHERE key = ?", [(k,) for k in keys])
+
+    # --- асинхронный интерфейс ---
+
+    async def warm(self):
+        """Загружает индекс в память из базы."""
+        if self._warmed:
+            return
+        rows = await self._run(self._load_rows)
+        if self._warmed:
+            return
+        # Строки идут от свежих к старым, в индекс кладём в обратном порядке
+        for key, value, expires_at in reversed(rows):
+            if key not in self._index:
+                self._index[key] = (json.loads(value), expires_at)
+                self._index.move_to_end(key, last=False)
+        self._warmed = True
+        logger.info("Кэш загружен", extra={"entries": len(self._index)})
+
+    async def get(self, key):
+        await self.warm()
+        item = self._index.get(key)
+        if item is None:
+            return None
+        entry, expires_at = item
+        if expires_at is not None and expires_at <= time.time():
+            del self._index[key]
+            await self._run(self._delete, [key])
+            return None
+        self._index.move_to_end(key)
+        self._touched[key] = time.time()
+        if len(self._touched) >= TOUCH_BATCH:
+            await self._run(self._touch, self._take_touched())
+        return entry
+
+    def _take_touched(self):
+        touched, self._touched = self._touched, {}
+        return touched
+
+    async def set(self, key, entry, ttl=None):
+        await self.warm()
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        self._index[key] = (entry, expires_at)
+        self._index.move_to_end(key)
+        evicted = []
+        while len(self._index) > self.max_entries:
+            old_key, _ = self._index.popitem(last=False)
+            evicted.append(old_key)
+        value = json.dumps(entry, ensure_ascii=False)
+        # Накопленные чтения уходят в базу вместе с записью
+        await self._run(self._write, key, value, expires_at, evicted, self._take_touched())
+
+    async def items(self, prefix=""):
+        """Снимок действующих записей индекса с ключами, начинающимися на prefix."""
+        now = time.time()
+        return [
+            (key, entry) for key, (entry, expires_at) in self._index.items()
+            if key.startswith(prefix) and (expires_at is None or expires_at > now)
+        ]
+
+    async def delete(self, key):
+        await self.warm()
+        self._index.pop(key, None)
+        await self._run(self._delete, [key])
+
+    async def close(self):
+        if self._touched:
+            await self._run(self._touch, self._take_touched())
+        await self._run(self._close)
+        self._warmed = False
+        self._index.clear()
+
+
+def create_cache_store(backend=CACHE_BACKEND):
+    """sqlite - локальный кэш процесса, redis - общий для нескольких процессов."""
+    if backend == "redis":
+        from utils.shared import RedisCacheStore
+        return RedisCacheStore()
+    return CacheStore()
+
+
+cache_store = create_cache_store()
+
+
+async def load_cache(key):
+    """Возвращает запись кэша ({"timestamp", "data"}) или None."""
+    kind = key.split("_", 1)[0]
+    try:
+        with CACHE_LATENCY.time(kind=kind):
+            entry = await cache_store.get(key)
+    except Exception as e:
+        logger.error("Ошибка при чтении кэша", extra={"key": key, "error": str(e)})
+        entry = None
+    CACHE_REQUESTS.inc(kind=kind, result="hit" if entry is not None else "miss")
+    return entry
+
+
+async def save_cache(key, data, ttl=None, **meta):
+    """Сохраняет данные в кэш под ключом key (meta - доп. поля записи, например etag)."""
+    entry = {
+        "timestamp": datetime.now().isoformat(),
+        "data": data,
+        **meta
+    }
+    try:
+        await cache_store.set(key, entry, ttl)
+    except Exception as e:
+        logger.error("Ошибка при сохранении кэша", extra={"key": key, "error": str(e)})
+    return entry
+
+
+async def warm_cache():
+    """Прогревает индекс кэша при старте бота."""
+    await cache_store.warm()
+
+
+async def close_cache():
+    await cache_store.close()
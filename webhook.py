@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import multiprocessing
+import socket
+from aiohttp import web
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from main import bot, dp
+from utils.logs import setup_logging
+from settings import (
+    WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_SECRET, WEBHOOK_WORKERS,
+    UPDATES_CONCURRENCY, FSM_STORAGE, CACHE_BACKEND, FLIGHT_BACKEND, REDIS_URL,
+)
+
+# Webhook-режим: N процессов принимают апдейты на одном порту.
+# Для нескольких процессов состояния FSM, кэш и single-flight должны быть общими:
+# FSM_STORAGE=redis, CACHE_BACKEND=redis, FLIGHT_BACKEND=redis.
+
+
+logger = logging.getLogger(__name__)
+
+
+def create_app(worker_index=0):
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=WEBHOOK_SECRET or None,
+        handle_in_background=True
+    ).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot, worker_index=worker_index)
+    return app
+
+
+def run_worker(worker_index, sock):
+    logger.info("Webhook-процесс запущен", extra={"worker": worker_index})
+    web.run_app(create_app(worker_index), sock=sock, print=None)
+
+
+async def set_webhook():
+    """Регистрирует webhook один раз, до запуска процессов."""
+    await bot.set_webhook(
+        url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+        secret_token=WEBHOOK_SECRET or None,
+        max_connections=min(UPDATES_CONCURRENCY, 100),
+        drop_pending_updates=False
+    )
+    await bot.session.close()
+
+
+def check_shared_backends(workers=WEBHOOK_WORKERS):
+    """Предупреждает о локальных хранилищах при нескольких процессах.
+
+    Без общего FSM апдейты одного чата в разных процессах видят разное состояние
+    (регистрация теряет имя), а порядок и взаимное исключение внутри чата не соблюдаются.
+    """
+    if workers <= 1:
+        return
+    local = [
+        name for name, value in (
+            ("FSM_STORAGE", FSM_STORAGE), ("CACHE_BACKEND", CACHE_BACKEND), ("FLIGHT_BACKEND", FLIGHT_BACKEND)
+        )
+        if value != "redis"
+    ]
+    if REDIS_URL.startswith("memory://"):
+        local.append("REDIS_URL")
+    if local:
+        logger.warning("Несколько webhook-процессов с локальными хранилищами", extra={
+            "workers": workers, "local_backends": ",".join(local)
+        })
+
+
+def main():
+    if not WEBHOOK_URL:
+        raise ValueError("WEBHOOK_URL not found in .env file")
+    # До fork: дочерние процессы перезапускают поток записи логов (utils.logs)
+    setup_logging()
+    check_shared_backends()
+    asyncio.run(set_webhook())
+
+    # Один слушающий сокет на все процессы: ядро само распределяет соединения
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((WEBHOOK_HOST, WEBHOOK_PORT))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+
+    if WEBHOOK_WORKERS <= 1:
+        run_worker(0, sock)
+        return
+
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=run_worker, args=(index, sock), daemon=False)
+        for index in range(WEBHOOK_WORKERS)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
+
+
+if __name__ == "__main__":
+    main()